@@ -0,0 +1,78 @@
+"""
+Shared-clock animations
+
+Sprites register the clip they play with an Animator, and one frame clock
+drives them all. The sprites playing the same clip are kept together, so a
+tick only checks each clip for a frame change, and the sprites of a clip
+are only touched on the ticks where its frame changes.
+"""
+
+
+class AnimationClip:
+    """Looping sequence of textures, each shown for frame_ticks ticks"""
+
+    def __init__(self, textures, frame_ticks):
+        self.textures = list(textures)
+        self.frame_ticks = frame_ticks
+
+        # Sprites playing a clip have the size of its frames, when they all
+        # have the same size a frame change needs no new spatial hash entry
+        self.same_size = len({(texture.width, texture.height) for texture in self.textures}) == 1
+
+    def frame_at(self, clock):
+        return self.textures[(clock // self.frame_ticks) % len(self.textures)]
+
+
+class Animator:
+    """Frame clock and the sprites animated by it"""
+
+    def __init__(self):
+        self.clock = 0
+
+        # clip -> sprites playing it
+        self.tracks = {}
+
+        # sprite -> clip it plays
+        self.clips = {}
+
+    def clear(self):
+        """Stop every animation and reset the clock."""
+        self.clock = 0
+        self.tracks = {}
+        self.clips = {}
+
+    def play(self, sprite, clip):
+        """Make a sprite play a clip, in step with the other sprites playing it."""
+        if self.clips.get(sprite) is clip:
+            return
+        self.stop(sprite)
+        self.clips[sprite] = clip
+        self.tracks.setdefault(clip, []).append(sprite)
+        sprite.texture = clip.frame_at(self.clock)
+
+    def stop(self, sprite):
+        """Stop animating a sprite, it keeps its current texture."""
+        clip = self.clips.pop(sprite, None)
+        if clip is None:
+            return
+        sprites = self.tracks[clip]
+        sprites.remove(sprite)
+        if not sprites:
+            del self.tracks[clip]
+
+    def advance(self, ticks=1):
+        """Move the clock forward and show the new frame of the clips whose frame changed."""
+        previous = self.clock
+        self.clock += ticks
+        for clip, sprites in self.tracks.items():
+            if previous // clip.frame_ticks == self.clock // clip.frame_ticks:
+                continue
+            texture = clip.frame_at(self.clock)
+            if clip.same_size:
+                for sprite in sprites:
+                    sprite._texture = texture
+                    for sprite_list in sprite.sprite_lists:
+                        sprite_list.update_texture(sprite)
+            else:
+                for sprite in sprites:
+                    sprite.texture = texture
@@ -0,0 +1,182 @@
+"""
+Asset registry
+
+Every texture, sound, sprite sheet and map tile the game loads goes through
+the registry, keyed by absolute path and variant (flipped, sprite sheet
+layout, tile region), so each one is decoded once however many views and sprites ask
+for it.
+
+Each request holds a reference until release() gives it back. Assets
+nobody holds stay cached, so a view shown again doesn't decode them again,
+until the cache is over its memory budget: then the least recently used of
+them are dropped, from the GPU atlas too.
+
+Loading is thread safe, the Preloader's worker thread loads through it.
+Files are decoded outside the registry's lock, so the main thread's lookups
+don't wait for the worker's decoding.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import arcade
+
+import atlas
+from constants import *
+
+
+class _Entry:
+    """An asset, its size in bytes and how many holders it has"""
+
+    __slots__ = ("asset", "size", "references")
+
+    def __init__(self, asset, size):
+        self.asset = asset
+        self.size = size
+        self.references = 0
+
+
+def _texture_size(texture):
+    return texture.image.width * texture.image.height * 4
+
+
+def _sound_size(sound):
+    # Decoded samples of a static source, a streamed one holds next to nothing
+    return len(getattr(sound.source, "_data", b"") or b"")
+
+
+def _path(file_name):
+    if str(file_name).startswith(":resources:"):
+        file_name = arcade.resources.resolve_resource_path(file_name)
+    return os.path.normpath(os.path.abspath(file_name))
+
+
+class AssetRegistry:
+    """Shared, reference counted textures and sounds"""
+
+    def __init__(self, budget=ASSET_MEMORY_BUDGET):
+        # Bytes the assets nobody holds may take before being dropped
+        self.budget = budget
+
+        # Key -> entry, least recently used first
+        self.entries = OrderedDict()
+
+        # id of an asset handed out -> its key
+        self.keys = {}
+
+        # Bytes taken by every entry
+        self.size = 0
+
+        # Files decoded since the start, to spot loads that should have hit the cache
+        self.decodes = 0
+
+        # Key -> event set once the asset is loaded, for the assets being loaded
+        self.loading = {}
+
+        self.lock = threading.RLock()
+
+    def _get(self, key, load, size):
+        # Requests for an asset being loaded wait for it, the others don't
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                entry.references += 1
+                return entry.asset
+            loading = self.loading.get(key)
+            if loading is None:
+                self.loading[key] = threading.Event()
+
+        if loading is not None:
+            # Loaded by another thread, or to load again if that failed
+            loading.wait()
+            return self._get(key, load, size)
+
+        try:
+            asset = load()
+            entry = _Entry(asset, size(asset))
+            with self.lock:
+                self.entries[key] = entry
+                self.keys[id(asset)] = key
+                self.size += entry.size
+                self.decodes += 1
+                entry.references += 1
+                self._evict()
+            return asset
+        finally:
+            with self.lock:
+                self.loading.pop(key).set()
+
+    def texture(self, file_name, flipped_horizontally=False):
+        """Get the texture of an image file, see atlas.load_texture."""
+        return self._get(("texture", _path(file_name), flipped_horizontally),
+                         lambda: atlas.load_texture(file_name, flipped_horizontally),
+                         _texture_size)
+
+    def texture_pair(self, file_name):
+        """Get the texture of an image file and its mirror image."""
+        return [self.texture(file_name), self.texture(file_name, flipped_horizontally=True)]
+
+    def sound(self, file_name):
+        return self._get(("sound", _path(file_name)), lambda: arcade.load_sound(file_name), _sound_size)
+
+    def spritesheet(self, file_name, sprite_width, sprite_height, columns, count):
+        """Get the textures of a sprite sheet as a list, see atlas.load_spritesheet."""
+        return self._get(("spritesheet", _path(file_name), sprite_width, sprite_height, columns, count),
+                         lambda: atlas.load_spritesheet(file_name, sprite_width, sprite_height, columns, count),
+                         lambda textures: sum(_texture_size(texture) for texture in textures))
+
+    def tile_textures(self, tiles):
+        """
+        Get the textures of map tiles as a list, each given as the compiled
+        levels keep it (see atlas.load_tile).
+        """
+        # Tileset file name -> its image, opened once for all the tiles
+        images = {}
+        return [self._get(("tile", _path(file_name), *tile),
+                          lambda file_name=file_name, tile=tile: atlas.load_tile(images, file_name, *tile),
+                          _texture_size)
+                for file_name, *tile in tiles]
+
+    def release(self, asset):
+        """Give back an asset got from the registry, or a list of them."""
+        with self.lock:
+            key = self.keys.get(id(asset))
+            if key is None:
+                if isinstance(asset, (list, tuple)):
+                    for item in asset:
+                        self.release(item)
+                return
+            entry = self.entries[key]
+            if entry.references > 0:
+                entry.references -= 1
+            self._evict()
+
+    def _evict(self):
+        for key in list(self.entries):
+            if self.size <= self.budget:
+                return
+            entry = self.entries[key]
+            if entry.references == 0:
+                self._drop(key, entry)
+
+    def _drop(self, key, entry):
+        del self.entries[key]
+        del self.keys[id(entry.asset)]
+        self.size -= entry.size
+        if key[0] == "sound":
+            return
+
+        textures = entry.asset if key[0] == "spritesheet" else [entry.asset]
+        try:
+            gpu_atlas = arcade.get_window().ctx.default_atlas
+        except RuntimeError:
+            # No window, nothing was uploaded
+            return
+        for texture in textures:
+            if gpu_atlas.has_texture(texture):
+                gpu_atlas.remove(texture)
+
+
+registry = AssetRegistry()
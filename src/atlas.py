@@ -0,0 +1,236 @@
+"""
+Texture atlases
+
+Packs the images the game uses into a few atlas PNGs, with mirrored copies
+of the images that are drawn facing both ways. The regions are written in
+the same SubTexture XML format as rsc/Spritesheets. Textures are then cut
+from one decoded atlas image instead of decoding every file on its own.
+
+The menu screens are not packed, as JPEGs they decode faster than they
+would inside a PNG atlas.
+
+Run this file to build the atlases, they are also rebuilt on first use
+whenever a source image is newer than its atlas.
+"""
+
+import os
+import xml.etree.ElementTree as ElementTree
+
+import arcade
+import PIL.Image
+
+from files import write_cache
+from image_cache import open_rgba
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+ATLAS_DIRECTORY = os.path.join(SOURCE_DIRECTORY, "..", "rsc", ".cache")
+
+# Widest an atlas can get, images are packed in rows up to this width
+ATLAS_MAX_WIDTH = 2048
+
+PLAYER_PATH = "../rsc/PNG/Players/128x256/Yellow/alienYellow"
+
+# Images packed in each atlas, relative to the src directory, and whether
+# a mirrored copy is needed
+ATLASES = {
+    "sprites": [
+        (f"{PLAYER_PATH}_stand.png", True),
+        (f"{PLAYER_PATH}_jump.png", True),
+        (f"{PLAYER_PATH}_swim1.png", True),
+        (f"{PLAYER_PATH}_walk1.png", True),
+        (f"{PLAYER_PATH}_walk2.png", True),
+        ("../rsc/PNG/Items/keyRed.png", False),
+        ("../rsc/PNG/Items/keyGreen.png", False),
+        ("../rsc/PNG/Items/keyYellow.png", False),
+        ("../rsc/PNG/Items/keyBlue.png", False),
+        ("../rsc/PNG/Items/coinGold.png", False),
+        ("../rsc/PNG/Enemies/sawHalf.png", False),
+        ("../rsc/PNG/Enemies/sawHalf_move.png", False),
+        ("../rsc/PNG/Tiles/bomb.png", False),
+    ],
+    "backgrounds": [
+        ("../rsc/PNG/Backgrounds/blue_land.png", False),
+        ("../rsc/PNG/Backgrounds/colored_grass.png", False),
+    ],
+}
+
+# Decoded atlas images and their regions, by atlas name
+_atlas_images = {}
+_atlas_regions = {}
+
+def _absolute(file_name):
+    return os.path.normpath(os.path.abspath(file_name))
+
+
+def _source_path(file_name):
+    return os.path.normpath(os.path.join(SOURCE_DIRECTORY, file_name))
+
+
+def _atlas_paths(name):
+    return os.path.join(ATLAS_DIRECTORY, f"atlas_{name}.png"), os.path.join(ATLAS_DIRECTORY, f"atlas_{name}.xml")
+
+
+def read_sub_textures(xml_file):
+    """
+    Read a SubTexture XML file, like the ones in rsc/Spritesheets.
+
+    Returns a dict of (name, flipped) to (x, y, width, height).
+    """
+    regions = {}
+    for sub_texture in ElementTree.parse(xml_file).getroot().iter("SubTexture"):
+        key = (sub_texture.get("name"), sub_texture.get("flipped") == "1")
+        regions[key] = tuple(int(sub_texture.get(attribute)) for attribute in ("x", "y", "width", "height"))
+    return regions
+
+
+def build_atlas(name):
+    """Pack the images of an atlas into its PNG and XML files."""
+    images = []
+    for file_name, mirrored in ATLASES[name]:
+        image = PIL.Image.open(_source_path(file_name)).convert("RGBA")
+        images.append((file_name, False, image))
+        if mirrored:
+            images.append((file_name, True, image.transpose(PIL.Image.Transpose.FLIP_LEFT_RIGHT)))
+
+    # Shelf packing, tallest images first
+    images.sort(key=lambda item: item[2].height, reverse=True)
+    placements = []
+    x = y = shelf_height = width = 0
+    for file_name, flipped, image in images:
+        if x + image.width > ATLAS_MAX_WIDTH:
+            x = 0
+            y += shelf_height
+            shelf_height = 0
+        placements.append((file_name, flipped, image, x, y))
+        x += image.width
+        width = max(width, x)
+        shelf_height = max(shelf_height, image.height)
+
+    atlas = PIL.Image.new("RGBA", (width, y + shelf_height))
+    root = ElementTree.Element("TextureAtlas", imagePath=f"atlas_{name}.png")
+    for file_name, flipped, image, x, y in placements:
+        atlas.paste(image, (x, y))
+        attributes = {
+            "name": file_name,
+            "x": str(x),
+            "y": str(y),
+            "width": str(image.width),
+            "height": str(image.height),
+        }
+        if flipped:
+            attributes["flipped"] = "1"
+        ElementTree.SubElement(root, "SubTexture", attributes)
+
+    # Light compression, the atlas is decoded again whenever it is rebuilt
+    png_path, xml_path = _atlas_paths(name)
+    write_cache(png_path, lambda file: atlas.save(file, format="PNG", compress_level=1),
+                xml_path, ElementTree.ElementTree(root).write, check_mode="wb")
+
+
+def _is_stale(name):
+    png_path, xml_path = _atlas_paths(name)
+    if not os.path.exists(png_path) or not os.path.exists(xml_path):
+        return True
+    built = min(os.path.getmtime(png_path), os.path.getmtime(xml_path))
+    return any(os.path.getmtime(_source_path(file_name)) > built for file_name, _ in ATLASES[name])
+
+
+def _load_atlas(name):
+    if name not in _atlas_images:
+        if _is_stale(name):
+            build_atlas(name)
+        png_path, xml_path = _atlas_paths(name)
+        _atlas_images[name] = open_rgba(png_path)
+        _atlas_regions[name] = {
+            (_source_path(file_name), flipped): region
+            for (file_name, flipped), region in read_sub_textures(xml_path).items()
+        }
+    return _atlas_images[name], _atlas_regions[name]
+
+
+def _find_atlas(path):
+    for name, entries in ATLASES.items():
+        if any(_source_path(file_name) == path for file_name, _ in entries):
+            return name
+    return None
+
+
+def load_texture(file_name, flipped_horizontally=False):
+    """
+    Make the texture of an image file, cut from its atlas when it is in one.
+
+    Images that are in no atlas, or whose mirror image wasn't packed, are
+    decoded on their own. Nothing is cached here, go through the asset
+    registry (assets.py) to share textures.
+    """
+    path = _absolute(file_name)
+    key = (path, flipped_horizontally)
+
+    name = _find_atlas(path)
+    region = None
+    if name is not None:
+        image, regions = _load_atlas(name)
+        region = regions.get(key)
+
+    if region is None:
+        image = open_rgba(path)
+        if flipped_horizontally:
+            image = image.transpose(PIL.Image.Transpose.FLIP_LEFT_RIGHT)
+    else:
+        x, y, width, height = region
+        image = image.crop((x, y, x + width, y + height))
+
+    return arcade.Texture(f"{path}-{flipped_horizontally}", image)
+
+
+def load_spritesheet(file_name, sprite_width, sprite_height, columns, count):
+    """Same as arcade.load_spritesheet, decoding the sheet through the image cache."""
+    path = arcade.resources.resolve_resource_path(file_name)
+    sheet = open_rgba(path)
+    textures = []
+    for sprite_no in range(count):
+        x = sprite_width * (sprite_no % columns)
+        y = sprite_height * (sprite_no // columns)
+        image = sheet.crop((x, y, x + sprite_width, y + sprite_height))
+        textures.append(arcade.Texture(f"{path}-{sprite_no}", image))
+    return textures
+
+
+def load_tile(images, file_name, image_x, image_y, width, height,
+              flipped_horizontally, flipped_vertically, flipped_diagonally):
+    """
+    Make the texture of a map tile, cut from the cached pixels of its
+    tileset image. images keeps the tileset images opened, by file name.
+    The hit box is left out, compiled levels keep their own.
+    """
+    if file_name not in images:
+        images[file_name] = open_rgba(file_name)
+    image = images[file_name]
+    if image_x or image_y or width or height:
+        image = image.crop((image_x, image_y, image_x + width, image_y + height))
+    else:
+        # The cached pixels are read only
+        image = image.copy()
+
+    if flipped_diagonally:
+        image = image.transpose(PIL.Image.Transpose.TRANSPOSE)
+    if flipped_horizontally:
+        image = image.transpose(PIL.Image.Transpose.FLIP_LEFT_RIGHT)
+    if flipped_vertically:
+        image = image.transpose(PIL.Image.Transpose.FLIP_TOP_BOTTOM)
+
+    name = (f"{_absolute(file_name)}-{image_x}-{image_y}-{width}-{height}-"
+            f"{flipped_horizontally}-{flipped_vertically}-{flipped_diagonally}")
+    return arcade.Texture(name, image, hit_box_algorithm="None")
+
+
+def main():
+    """Build every atlas"""
+    for name in ATLASES:
+        build_atlas(name)
+        png_path, _ = _atlas_paths(name)
+        print(f"{name}: {PIL.Image.open(png_path).size}")
+
+
+if __name__ == "__main__":
+    main()
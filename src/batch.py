@@ -0,0 +1,83 @@
+"""
+Batch runner
+
+Plays many independent headless sessions of the level across a process pool.
+Each session is an input script, see GameSimulation.run for the format.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from constants import *
+from level_cache import read_level
+from simulation import GameSimulation
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# One simulation per worker process, reused between sessions
+_simulation = None
+
+
+def _init_worker(map_name):
+    global _simulation
+    _simulation = GameSimulation(map_name)
+
+
+def _run_script(args):
+    inputs, max_ticks = args
+    _simulation.restart()
+    outcome = _simulation.run(inputs, max_ticks)
+    return {
+        "outcome": outcome,
+        "score": _simulation.score,
+        "ticks": _simulation.tick,
+    }
+
+
+def run_sessions(scripts, max_ticks=TICK_RATE * 60, workers=None, map_name=MAP_NAME):
+    """
+    Play one session per input script and return their results in order.
+
+    Each result is a dict with the outcome (one of the OUTCOME_* constants, or
+    None if max_ticks ran out first), the score and the number of ticks played.
+    """
+    jobs = [(list(inputs), max_ticks) for inputs in scripts]
+    workers = min(workers or os.cpu_count() or 1, len(jobs)) or 1
+
+    # Compile the level here if its cache is missing or stale, so the
+    # workers only ever read it. Map names are relative to the src directory.
+    read_level(os.path.join(SOURCE_DIRECTORY, map_name), TILE_SCALING)
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(map_name,)) as executor:
+        return list(executor.map(_run_script, jobs))
+
+
+def main():
+    """Run copies of a walk-and-jump script and report session throughput"""
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    scripts = []
+    for i in range(sessions):
+        # Vary the jump timing so the sessions do not all play the same run
+        jump_tick = 30 + i * 7
+        scripts.append([
+            (1, INPUT_RIGHT, True),
+            (jump_tick, INPUT_JUMP, True),
+            (jump_tick + 10, INPUT_JUMP, False),
+        ])
+
+    start = time.perf_counter()
+    results = run_sessions(scripts, TICK_RATE * 10, workers)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        print(result)
+    ticks = sum(result["ticks"] for result in results)
+    print(f"{sessions} sessions, {ticks / elapsed:.0f} ticks per second overall")
+
+
+if __name__ == "__main__":
+    main()
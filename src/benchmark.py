@@ -0,0 +1,319 @@
+"""
+Benchmark suite
+
+Measures startup, the level load, the tick and the draw hot paths on the
+default map and writes the results as JSON. Given a baseline file, each
+result is compared with it and the run fails when one got slower than the
+tolerance.
+
+Drawing goes to an offscreen software GL context, arcade's headless mode.
+The GameView cases are skipped when the view can't be built, for instance
+when the game's sounds can't be decoded.
+
+    python benchmark.py [--output results.json] [--baseline baseline.json] [--update-baseline]
+                        [--runs 5] [--tolerance 0.15]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("ARCADE_HEADLESS", "1")
+
+import arcade
+
+from constants import *
+
+# Slowdown over the baseline that counts as a regression
+TOLERANCE = 0.15
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(SOURCE_DIRECTORY, "..", "benchmark_baseline.json")
+
+# Walk right, jumping now and then
+TICK_SCRIPT = [(1, INPUT_RIGHT, True)] + [
+    (tick + offset, INPUT_JUMP, pressed)
+    for tick in range(40, TICK_RATE * 30, 90)
+    for offset, pressed in ((0, True), (12, False))
+]
+
+
+def _result(values, unit="ms"):
+    # Rates get better going up, times going down
+    rate = unit.endswith("/s")
+    return {
+        "unit": unit,
+        "runs": len(values),
+        "median": statistics.median(values),
+        "best": max(values) if rate else min(values),
+    }
+
+
+def time_calls(function, runs, before=None):
+    """Call function runs times, return the result of the timings in milliseconds."""
+    times = []
+    for _ in range(runs):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return _result(times)
+
+
+def bench_load_tilemap(runs):
+    """arcade.load_tilemap and Scene.from_tilemap, the first (cold) call and the next ones."""
+    def load():
+        tile_map = arcade.load_tilemap(MAP_NAME, TILE_SCALING)
+        arcade.Scene.from_tilemap(tile_map)
+
+    return {
+        "load_tilemap_cold": time_calls(load, 1),
+        "load_tilemap_warm": time_calls(load, runs),
+    }
+
+
+def bench_load_level(runs):
+    """The same through the compiled level cache."""
+    from level_cache import load_level
+
+    def load():
+        load_level(MAP_NAME, TILE_SCALING).to_scene()
+
+    return {"load_level_warm": time_calls(load, runs)}
+
+
+def bench_player(runs):
+    from animation import Animator
+    from entities.player import PlayerCharacter
+
+    animator = Animator()
+    return {"player_construction": time_calls(lambda: PlayerCharacter(animator), runs)}
+
+
+def bench_simulation(runs):
+    """Simulation setup, restart and ticks per second over TICK_SCRIPT."""
+    from simulation import GameSimulation
+
+    results = {}
+    simulation = GameSimulation()
+    results["simulation_setup"] = time_calls(simulation.setup, 1)
+    results["simulation_restart"] = time_calls(simulation.restart, runs)
+
+    rates = []
+    for _ in range(runs):
+        simulation.restart()
+        start = time.perf_counter()
+        simulation.run(TICK_SCRIPT, TICK_RATE * 30)
+        rates.append(simulation.tick / (time.perf_counter() - start))
+    results["ticks_per_second"] = _result(rates, "ticks/s")
+    return results
+
+
+def bench_view(window, runs):
+    """GameView setup and restart, and offscreen frame draw time."""
+    import ui
+
+    try:
+        view = ui.GameView()
+    except Exception as error:
+        return {"game_view": {"skipped": f"{type(error).__name__}: {error}"}}
+
+    results = {"game_view_setup": time_calls(lambda: window.show_view(view), 1)}
+    results["game_view_restart"] = time_calls(view.setup, runs)
+
+    view.simulation.press(INPUT_RIGHT)
+
+    def frame():
+        view.on_draw()
+        window.ctx.finish()
+
+    results["draw_frame"] = time_calls(frame, runs * 10, before=lambda: view.on_update(TICK_DURATION))
+    return results
+
+
+def startup_probe():
+    """
+    Time, in this fresh process, the main menu's first frame and then the
+    game's first frame, clicking Start Game as soon as the assets are loaded,
+    from the process start and from the click. Prints them as JSON for
+    bench_startup.
+    """
+    import game
+
+    # game.py runs from the repository root
+    os.chdir(os.path.join(SOURCE_DIRECTORY, ".."))
+    times = {}
+    start = time.perf_counter()
+    window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, visible=False)
+    menu = game.MainMenu()
+    window.show_view(menu)
+    menu.on_draw()
+    window.ctx.finish()
+    times["time_to_menu"] = (time.perf_counter() - start) * 1000
+
+    try:
+        while not menu.preloader.done:
+            time.sleep(0.001)
+        click = time.perf_counter()
+        menu.start_game()
+        window.current_view.on_draw()
+        window.ctx.finish()
+        end = time.perf_counter()
+        times["time_to_first_frame"] = (end - start) * 1000
+        times["click_to_first_frame"] = (end - click) * 1000
+    except Exception as error:
+        times["time_to_first_frame"] = times["click_to_first_frame"] = f"{type(error).__name__}: {error}"
+    print(json.dumps(times))
+
+
+def bench_startup(runs):
+    """
+    Time to the menu and to the first game frame, each in a new process, and
+    from clicking Start Game to that frame.
+    The first run is the cold one, the decoded image cache is filled by then.
+    """
+    samples = []
+    for _ in range(runs + 1):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--startup-probe"],
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    results = {}
+    for name in ("time_to_menu", "time_to_first_frame", "click_to_first_frame"):
+        if isinstance(samples[0][name], str):
+            results[name] = {"skipped": samples[0][name]}
+            continue
+        results[f"{name}_cold"] = _result([samples[0][name]])
+        results[name] = _result([sample[name] for sample in samples[1:]])
+    return results
+
+
+def bench_draw_scene(window, runs):
+    """Offscreen draw time of the level alone, without the view, whole and culled to the screen."""
+    from culling import ChunkedScene
+    from simulation import GameSimulation
+
+    simulation = GameSimulation()
+    simulation.setup()
+    simulation.press(INPUT_RIGHT)
+    camera = arcade.Camera(window.width, window.height)
+
+    chunked_scene = ChunkedScene(simulation.scene)
+
+    def frame():
+        window.clear()
+        camera.use()
+        simulation.scene.draw()
+        window.ctx.finish()
+
+    def culled_frame():
+        window.clear()
+        camera.use()
+        chunked_scene.draw(0, window.width)
+        window.ctx.finish()
+
+    return {
+        "draw_scene": time_calls(frame, runs * 10, before=simulation.step),
+        "draw_scene_culled": time_calls(culled_frame, runs * 10, before=simulation.step),
+    }
+
+
+def run_suite(runs=5):
+    """Run every benchmark, return {name: result}."""
+    # Resource paths are relative to the src directory
+    os.chdir(SOURCE_DIRECTORY)
+
+    # Startup in its own processes, then the cold cases, before anything
+    # loads the map's textures
+    results = bench_startup(runs)
+    results.update(bench_load_tilemap(runs))
+    results.update(bench_load_level(runs))
+    results.update(bench_player(runs))
+    results.update(bench_simulation(runs))
+
+    window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, visible=False)
+    results.update(bench_draw_scene(window, runs))
+    results.update(bench_view(window, runs))
+    window.close()
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Return the (name, baseline median, median, change) of the results slower than the baseline."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if "median" not in result or not reference or "median" not in reference:
+            continue
+        if result["unit"].endswith("/s"):
+            change = reference["median"] / result["median"] - 1
+        else:
+            change = result["median"] / reference["median"] - 1
+        if change > tolerance:
+            regressions.append((name, reference["median"], result["median"], change))
+    return regressions
+
+
+def main():
+    """Run the suite, write the results and compare them with the baseline"""
+    parser = argparse.ArgumentParser(description="Benchmark the level load, tick and draw hot paths")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="slowdown counted as a regression")
+    parser.add_argument("--startup-probe", action="store_true", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+    if arguments.startup_probe:
+        startup_probe()
+        return
+    output = arguments.output and os.path.abspath(arguments.output)
+    baseline_file = os.path.abspath(arguments.baseline)
+
+    results = run_suite(arguments.runs)
+    report = {
+        "map": MAP_NAME,
+        "python": platform.python_version(),
+        "arcade": arcade.version.VERSION,
+        "machine": platform.platform(),
+        "results": results,
+    }
+
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:24} skipped: {result['skipped']}")
+        else:
+            print(f"{name:24} {result['median']:10.2f} {result['unit']} (best {result['best']:.2f}, {result['runs']} runs)")
+
+    if output:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if arguments.update_baseline:
+        with open(baseline_file, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline written to {baseline_file}")
+        return
+
+    if not os.path.exists(baseline_file):
+        print("No baseline to compare with, store one with --update-baseline")
+        return
+
+    with open(baseline_file) as file:
+        baseline = json.load(file)["results"]
+    regressions = compare(results, baseline, arguments.tolerance)
+    for name, reference, median, change in regressions:
+        print(f"REGRESSION {name}: {reference:.2f} -> {median:.2f} ({change:+.0%})")
+    if regressions:
+        sys.exit(1)
+    print(f"No regression over {arguments.tolerance:.0%} against {baseline_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Kinematic bodies
+
+Moving platforms and moving enemies follow their speed, with no physics of
+their own, so they are stepped all at once: their positions, speeds,
+boundaries and hit box extents are kept in NumPy arrays, packed at the
+front. A body bounces off its boundaries the way arcade's platformer engine
+bounces moving platforms; along an axis without boundaries it turns around
+when it runs into a solid cell of the level's static grid.
+
+Only the bodies near the player have their sprite moved, which costs a
+spatial hash update each. The others move in the arrays alone and catch up
+when they come back near.
+"""
+
+import math
+
+import numpy as np
+
+from constants import *
+
+# Initial room for bodies, the arrays double when full
+BODY_CAPACITY = 64
+
+
+def solid_grid(xs, ys, cell_size=GRID_PIXEL_SIZE):
+    """Grid of the cells holding a tile, indexed [column, row], from the tiles' centers."""
+    columns = np.floor(np.asarray(xs, dtype=np.float64) / cell_size).astype(np.int64)
+    rows = np.floor(np.asarray(ys, dtype=np.float64) / cell_size).astype(np.int64)
+    keep = (columns >= 0) & (rows >= 0)
+    columns, rows = columns[keep], rows[keep]
+    grid = np.zeros((columns.max() + 1 if len(columns) else 0, rows.max() + 1 if len(rows) else 0), dtype=bool)
+    grid[columns, rows] = True
+    return grid
+
+
+class KinematicBodies:
+    """The sprites moving on their own, stepped together"""
+
+    def __init__(self, grid=None, cell_size=GRID_PIXEL_SIZE, capacity=BODY_CAPACITY):
+        self.grid = np.zeros((0, 0), dtype=bool) if grid is None else grid
+        self.cell_size = cell_size
+
+        # Bodies are the first `count` entries of these arrays
+        self.count = 0
+        # (center_x, center_y)
+        self.positions = np.zeros((capacity, 2), dtype=np.float64)
+        # Move per tick along x and y
+        self.velocities = np.zeros((capacity, 2), dtype=np.float64)
+        # Boundary left, right, bottom and top, NaN when there is none
+        self.bounds = np.full((capacity, 4), np.nan, dtype=np.float64)
+        # Hit box left, right, bottom and top, from the center
+        self.extents = np.zeros((capacity, 4), dtype=np.float64)
+        self.sprites = []
+
+        # sprite -> its index in the arrays
+        self.index = {}
+
+        # (sprite, x, y before) of the sprites the last update moved
+        self.moves = []
+
+    def clear(self):
+        self.count = 0
+        self.sprites = []
+        self.index = {}
+        self.moves = []
+
+    def _grow(self):
+        capacity = 2 * len(self.positions)
+        for name in ("positions", "velocities", "extents"):
+            array = getattr(self, name)
+            grown = np.zeros((capacity, array.shape[1]), dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+        bounds = np.full((capacity, 4), np.nan, dtype=np.float64)
+        bounds[:self.count] = self.bounds[:self.count]
+        self.bounds = bounds
+
+    def add(self, sprite, moves_per_tick=1):
+        """Step a sprite with the bodies, moving it by its change_x and change_y moves_per_tick times a tick."""
+        if self.count == len(self.positions):
+            self._grow()
+
+        index = self.count
+        self.positions[index] = sprite.position
+        self.velocities[index] = (sprite.change_x * moves_per_tick, sprite.change_y * moves_per_tick)
+        # As in arcade's engine, a boundary of 0 along x counts as none
+        self.bounds[index] = (
+            sprite.boundary_left or np.nan,
+            sprite.boundary_right or np.nan,
+            np.nan if sprite.boundary_bottom is None else sprite.boundary_bottom,
+            np.nan if sprite.boundary_top is None else sprite.boundary_top,
+        )
+        self.extents[index] = (
+            sprite.left - sprite.center_x,
+            sprite.right - sprite.center_x,
+            sprite.bottom - sprite.center_y,
+            sprite.top - sprite.center_y,
+        )
+        self.sprites.append(sprite)
+        self.index[sprite] = index
+        self.count += 1
+
+    def remove(self, sprite):
+        """Stop stepping a sprite, leaving it where its body got to."""
+        index = self.index.pop(sprite, None)
+        if index is None:
+            return
+        self._write(index)
+
+        # Move the last body into the freed slot
+        last = self.count - 1
+        if index != last:
+            for array in (self.positions, self.velocities, self.bounds, self.extents):
+                array[index] = array[last]
+            moved = self.sprites[last]
+            self.sprites[index] = moved
+            self.index[moved] = index
+        self.sprites.pop()
+        self.count = last
+
+    def _write(self, index):
+        self.sprites[index].position = tuple(self.positions[index].tolist())
+
+    def write_all(self):
+        """Move every sprite to where its body is."""
+        for index in range(self.count):
+            self._write(index)
+
+    def _bounce(self, axis, low, high):
+        # Clamp to the boundaries of the axis and turn back towards them
+        positions = self.positions[:self.count, axis]
+        velocities = self.velocities[:self.count, axis]
+        bounds = self.bounds[:self.count]
+        extents = self.extents[:self.count]
+        turned = np.zeros(self.count, dtype=bool)
+
+        below = positions + extents[:, low] <= bounds[:, low]
+        positions[below] = bounds[below, low] - extents[below, low]
+        turned |= below & (velocities < 0)
+
+        above = positions + extents[:, high] >= bounds[:, high]
+        positions[above] = bounds[above, high] - extents[above, high]
+        turned |= above & (velocities > 0)
+
+        velocities[turned] *= -1
+        return turned
+
+    def _collide(self, axis, low, high):
+        # Bodies free along the axis turn back from the solid cells they ran into
+        positions = self.positions[:self.count]
+        velocities = self.velocities[:self.count, axis]
+        bounds = self.bounds[:self.count]
+        extents = self.extents[:self.count]
+
+        free = np.isnan(bounds[:, low]) & np.isnan(bounds[:, high]) & (velocities != 0)
+        if not free.any() or self.grid.size == 0:
+            return np.zeros(self.count, dtype=bool)
+
+        edges = positions[:, axis] + np.where(velocities > 0, extents[:, high], extents[:, low])
+        cells = np.floor(positions / self.cell_size).astype(np.int64)
+        cells[:, axis] = np.floor(edges / self.cell_size).astype(np.int64)
+        inside = free & (cells >= 0).all(axis=1) & (cells < self.grid.shape).all(axis=1)
+        hit = np.zeros(self.count, dtype=bool)
+        hit[inside] = self.grid[cells[inside, 0], cells[inside, 1]]
+
+        positions[hit, axis] -= velocities[hit]
+        velocities[hit] *= -1
+        return hit
+
+    def update(self, left=-math.inf, right=math.inf):
+        """
+        Move every body one tick. Only the sprites of the bodies overlapping
+        left to right along x are moved; they are returned, and kept in moves
+        with where they were.
+        """
+        if self.count == 0:
+            self.moves = []
+            return []
+
+        positions = self.positions[:self.count]
+        velocities = self.velocities[:self.count]
+
+        turned_x = self._bounce(0, 0, 1)
+        positions[:, 0] += velocities[:, 0]
+        turned_x |= self._collide(0, 0, 1)
+
+        turned_y = self._bounce(1, 2, 3)
+        positions[:, 1] += velocities[:, 1]
+        turned_y |= self._collide(1, 2, 3)
+
+        # Sprites keep their speed's sign, which the player's physics reads
+        # when riding a platform
+        for index in np.flatnonzero(turned_x).tolist():
+            self.sprites[index].change_x *= -1
+        for index in np.flatnonzero(turned_y).tolist():
+            self.sprites[index].change_y *= -1
+
+        extents = self.extents[:self.count]
+        near = (positions[:, 0] + extents[:, 1] >= left) & (positions[:, 0] + extents[:, 0] <= right)
+        moved = []
+        self.moves = []
+        for index, position in zip(np.flatnonzero(near).tolist(), positions[near].tolist()):
+            sprite = self.sprites[index]
+            x, y = sprite.position
+            self.moves.append((sprite, x, y))
+            sprite.position = tuple(position)
+            moved.append(sprite)
+        return moved
@@ -0,0 +1,83 @@
+"""
+Armed bombs
+
+Any number of bombs can be ticking at once, up to MAX_BOMBS. Their fuses
+and positions are kept in NumPy arrays, packed at the front, and their
+sprites come from a fixed pool so arming a bomb never allocates.
+"""
+
+import arcade
+import numpy as np
+
+from constants import *
+
+
+class BombSystem:
+    """The bombs currently armed in the level"""
+
+    def __init__(self, texture, capacity=MAX_BOMBS, lazy=False):
+        self.texture = texture
+        self.capacity = capacity
+
+        # Armed bombs are the first `count` entries of these arrays
+        self.count = 0
+        self.timers = np.zeros(capacity, dtype=np.int32)
+        self.positions = np.zeros((capacity, 2), dtype=np.float64)
+        self.pool = [arcade.Sprite(texture=texture, scale=0.5) for _ in range(capacity)]
+
+        # The armed bombs' sprites, for drawing
+        self.sprite_list = arcade.SpriteList(lazy=lazy)
+
+    def clear(self):
+        """Disarm every bomb."""
+        for sprite in self.pool[:self.count]:
+            sprite.remove_from_sprite_lists()
+        self.count = 0
+
+    def arm(self, x, y, fuse=BOMB_FUSE):
+        """Arm a bomb at (x, y), return False if too many are already armed."""
+        if self.count == self.capacity:
+            return False
+
+        index = self.count
+        self.timers[index] = fuse
+        self.positions[index] = (x, y)
+        sprite = self.pool[index]
+        sprite.position = (x, y)
+        self.sprite_list.append(sprite)
+        self.count += 1
+        return True
+
+    def detonate_near(self, x, y, radius):
+        """Make the bombs closer than radius to (x, y) go off on the next update."""
+        offsets = self.positions[:self.count] - (x, y)
+        near = (offsets ** 2).sum(axis=1) < radius ** 2
+        timers = self.timers[:self.count]
+        timers[near] = np.minimum(timers[near], 1)
+
+    def _disarm(self, index):
+        # Move the last armed bomb into the freed slot
+        last = self.count - 1
+        sprite = self.pool[index]
+        sprite.remove_from_sprite_lists()
+        if index != last:
+            self.timers[index] = self.timers[last]
+            self.positions[index] = self.positions[last]
+            self.pool[index], self.pool[last] = self.pool[last], sprite
+        self.count = last
+
+    def update(self):
+        """Burn one tick off every fuse, return the positions of the bombs that went off."""
+        if self.count == 0:
+            return []
+
+        timers = self.timers[:self.count]
+        timers -= 1
+        exploded = np.flatnonzero(timers <= 0)
+        if len(exploded) == 0:
+            return []
+
+        positions = [tuple(self.positions[index].tolist()) for index in exploded]
+        for index in exploded[::-1]:
+            self._disarm(index)
+        return positions
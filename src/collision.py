@@ -0,0 +1,94 @@
+"""
+Merged collision shapes
+
+Static tile layers are drawn tile by tile, but for collisions the tiles whose
+hit box fills their whole cell are merged into as few rectangles as possible.
+The physics engine then checks the player against a handful of long
+invisible sprites instead of every tile around it. Tiles with any other hit
+box (bevelled corners, slopes) are kept as they are.
+"""
+
+import arcade
+import PIL.Image
+
+from constants import *
+
+# Texture of the rectangles, stretched to their size. They are never drawn.
+_rectangle_texture = arcade.Texture(
+    "collision-rectangle", PIL.Image.new("RGBA", (1, 1), (255, 255, 255, 255)), hit_box_algorithm="None")
+
+
+def _fills_cell(sprite, cell_size):
+    points = sprite.get_adjusted_hit_box()
+    if len(points) != 4:
+        return False
+    xs = sorted(x for x, _ in points)
+    ys = sorted(y for _, y in points)
+    half = cell_size / 2
+    return (
+        # An axis-aligned rectangle...
+        xs[0] == xs[1] and xs[2] == xs[3] and ys[0] == ys[1] and ys[2] == ys[3]
+        # ...covering the cell
+        and abs(xs[0] - (sprite.center_x - half)) < 1e-6 and abs(xs[3] - (sprite.center_x + half)) < 1e-6
+        and abs(ys[0] - (sprite.center_y - half)) < 1e-6 and abs(ys[3] - (sprite.center_y + half)) < 1e-6
+    )
+
+
+def merge_cells(cells):
+    """
+    Cover a set of (column, row) cells with rectangles, greedily: the longest
+    run of each row first, grown over the next rows while they have the same
+    run. Returns (column, row, columns, rows) rectangles.
+    """
+    remaining = set(cells)
+    rectangles = []
+    for column, row in sorted(cells, key=lambda cell: (cell[1], cell[0])):
+        if (column, row) not in remaining:
+            continue
+
+        columns = 1
+        while (column + columns, row) in remaining:
+            columns += 1
+
+        rows = 1
+        while all((column + offset, row + rows) in remaining for offset in range(columns)):
+            rows += 1
+
+        for y in range(row, row + rows):
+            for x in range(column, column + columns):
+                remaining.discard((x, y))
+        rectangles.append((column, row, columns, rows))
+    return rectangles
+
+
+def merged_walls(sprites, cell_size=GRID_PIXEL_SIZE):
+    """
+    Return the sprites to collide with instead of static tiles: one invisible
+    rectangle per block of full-cell tiles, plus the tiles that could not be
+    merged.
+    """
+    walls = []
+
+    cells = set()
+    for sprite in sprites:
+        if _fills_cell(sprite, cell_size):
+            cells.add((round(sprite.left / cell_size), round(sprite.bottom / cell_size)))
+        else:
+            walls.append(sprite)
+
+    for column, row, columns, rows in merge_cells(cells):
+        rectangle = arcade.Sprite(texture=_rectangle_texture)
+        rectangle.width = columns * cell_size
+        rectangle.height = rows * cell_size
+        rectangle.left = column * cell_size
+        rectangle.bottom = row * cell_size
+        walls.append(rectangle)
+
+    return walls
+
+
+def merge_tiles(sprite_list, cell_size=GRID_PIXEL_SIZE, lazy=False):
+    """Return a spatially hashed SpriteList of the merged_walls of a static tile layer."""
+    collision_list = arcade.SpriteList(use_spatial_hash=True, lazy=lazy)
+    collision_list.extend(merged_walls(sprite_list, cell_size))
+    return collision_list
@@ -40,6 +40,39 @@ LAYER_NAME_BOMB_WALLS = "Bombing"
 LAYER_NAME_BOMB = "Bomb"
 LAYER_NAME_EXIT = "Exit"
 
+# How close the player has to be to a door to open it
+DOOR_OPEN_DISTANCE = 100
+
+# Walls, bombs and the player closer than this to a bomb are hit by its explosion
+EXPLOSION_RADIUS = 200
+
+# Ticks between arming a bomb and its explosion
+BOMB_FUSE = 120
+
+# Most bombs armed at once, and explosions shown at once
+MAX_BOMBS = 16
+EXPLOSION_POOL_SIZE = MAX_BOMBS
+
+# Ticks each frame of the enemy and player walk animations is shown
+ENEMY_FRAME_TICKS = 4
+PLAYER_WALK_FRAME_TICKS = 7
+
+# Width of the chunks static layers are drawn by, and how far past the
+# screen edges chunks are still drawn
+CHUNK_WIDTH = 16 * GRID_PIXEL_SIZE
+DRAW_MARGIN = 2 * GRID_PIXEL_SIZE
+
+# Moving platforms and enemies farther than this from the player along x
+# are only moved in their arrays, not on screen
+BODY_ACTIVE_DISTANCE = SCREEN_WIDTH
+
+# Streamed levels are built by chunks of STREAM_CHUNK_WIDTH pixels: the
+# chunks up to STREAM_LOAD_CHUNKS away from the player's are loaded, the
+# ones more than STREAM_KEEP_CHUNKS away evicted
+STREAM_CHUNK_WIDTH = 16 * GRID_PIXEL_SIZE
+STREAM_LOAD_CHUNKS = 1
+STREAM_KEEP_CHUNKS = 2
+
 # Player start position
 PLAYER_START_X = 2
 PLAYER_START_Y = 5
@@ -47,3 +80,57 @@ PLAYER_START_Y = 5
 # Constants used to track if the player is facing left or right
 RIGHT_FACING = 0
 LEFT_FACING = 1
+
+# Map file, relative to the src directory
+MAP_NAME = "../rsc/map.json"
+
+# Fixed simulation tick, the game logic counts frames at this rate
+TICK_RATE = 60
+TICK_DURATION = 1 / TICK_RATE
+
+# Most ticks run for one rendered frame, when catching up
+MAX_TICKS_PER_FRAME = 5
+
+# Part of the way to the player the camera moves each tick
+CAMERA_SPEED = 0.2
+
+# Maps played in turn, reaching the exit of one starting the next
+LEVELS = (MAP_NAME,)
+
+# Levels kept built once played or built ahead, at least 2: the current
+# one and the next
+LEVEL_CACHE_SIZE = 3
+
+# Ticks a level runs before the next one starts being built ahead
+LEVEL_PREFETCH_TICKS = TICK_RATE
+
+# Sprite lists of a level built ahead given their OpenGL buffers per frame
+LEVEL_LISTS_PER_FRAME = 4
+
+# Bytes of decoded textures and sounds kept cached once no view uses them
+ASSET_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Inputs understood by the simulation
+INPUT_JUMP = "jump"
+INPUT_DOWN = "down"
+INPUT_LEFT = "left"
+INPUT_RIGHT = "right"
+INPUT_USE = "use"
+INPUT_DROP = "drop"
+# Any other key, the held inputs are only applied again
+INPUT_OTHER = "other"
+
+# Ways a run can end, named after the matching game over screens
+OUTCOME_ENEMY = "normal"
+OUTCOME_WATER = "water"
+OUTCOME_WIN = "win"
+
+# Events emitted by the simulation for the renderer (sounds, effects)
+EVENT_JUMP = "jump"
+EVENT_GAME_OVER = "game_over"
+EVENT_WATER = "water"
+EVENT_WIN = "win"
+EVENT_CHECKPOINT = "checkpoint"
+EVENT_COIN = "coin"
+EVENT_GRAB = "grab"
+EVENT_EXPLOSION = "explosion"
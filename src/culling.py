@@ -0,0 +1,101 @@
+"""
+Chunked scene drawing
+
+The static layers of a scene are split into chunks of CHUNK_WIDTH pixels
+along x, each its own SpriteList, and only the chunks overlapping the
+camera's view are drawn. The number of sprites drawn then depends on the
+screen width, not on the level's. Layers with moving sprites, and the
+player's, are drawn whole.
+
+A sprite is in both its layer and its chunk, so taking it out of the level
+with remove_from_sprite_lists takes it out of its chunk too. restore()
+puts the chunks back as they were built, after a scene snapshot restore.
+"""
+
+import math
+
+import arcade
+
+from constants import *
+from snapshot import SceneSnapshot
+
+
+class ChunkedScene:
+    """Draws the part of a scene in view"""
+
+    def __init__(self, scene, chunk_width=CHUNK_WIDTH, dynamic_layers=(LAYER_NAME_PLAYER,)):
+        self.scene = scene
+        self.chunk_width = chunk_width
+
+        # For each layer, in drawing order: (sprite list, chunks, margin).
+        # chunks is None for the layers drawn whole, else a dict of chunk
+        # index to SpriteList, margin covering the widest sprite.
+        self.layers = []
+        # Layer name -> its index in self.layers
+        self.names = {}
+        chunk_lists = {}
+        for name, sprite_list in scene.name_mapping.items():
+            self.names[name] = len(self.layers)
+            moving = any(sprite.change_x or sprite.change_y for sprite in sprite_list)
+            if name in dynamic_layers or moving:
+                self.layers.append((sprite_list, None, 0))
+                continue
+
+            chunks = {}
+            margin = 0
+            for sprite in sprite_list:
+                index = math.floor(sprite.center_x / chunk_width)
+                if index not in chunks:
+                    chunks[index] = arcade.SpriteList(lazy=True)
+                    chunks[index].visible = sprite_list.visible
+                chunks[index].append(sprite)
+                margin = max(margin, sprite.width / 2)
+            self.layers.append((sprite_list, chunks, margin))
+            chunk_lists.update({(name, index): chunk for index, chunk in chunks.items()})
+
+        self.snapshot = SceneSnapshot(chunk_lists)
+
+    def restore(self):
+        """Put back in their chunk the sprites put back in their layer."""
+        self.snapshot.restore()
+
+    def replace(self, name, removed, added):
+        """
+        Follow sprites of a layer being swapped for others, see
+        GameSimulation.replace_sprites. The removed ones must be out of the
+        layer already.
+        """
+        sprite_list, chunks, margin = self.layers[self.names[name]]
+        if chunks is None:
+            return
+
+        removed_by_chunk = {}
+        for sprite in removed:
+            removed_by_chunk.setdefault(math.floor(sprite.center_x / self.chunk_width), []).append(sprite)
+        added_by_chunk = {}
+        for sprite in added:
+            index = math.floor(sprite.center_x / self.chunk_width)
+            if index not in chunks:
+                chunks[index] = arcade.SpriteList(lazy=True)
+                chunks[index].visible = sprite_list.visible
+            chunks[index].append(sprite)
+            added_by_chunk.setdefault(index, []).append(sprite)
+            margin = max(margin, sprite.width / 2)
+        self.layers[self.names[name]] = (sprite_list, chunks, margin)
+
+        for index in removed_by_chunk.keys() | added_by_chunk.keys():
+            self.snapshot.replace((name, index), removed_by_chunk.get(index, []), added_by_chunk.get(index, []),
+                                  chunks.get(index))
+
+    def draw(self, left, right):
+        """Draw the sprites between left and right, plus DRAW_MARGIN."""
+        for sprite_list, chunks, margin in self.layers:
+            if chunks is None:
+                sprite_list.draw()
+                continue
+            first = math.floor((left - DRAW_MARGIN - margin) / self.chunk_width)
+            last = math.floor((right + DRAW_MARGIN + margin) / self.chunk_width)
+            for index in range(first, last + 1):
+                chunk = chunks.get(index)
+                if chunk is not None:
+                    chunk.draw()
@@ -1,5 +1,6 @@
 import arcade
 
+from animation import AnimationClip
 from constants import *
 from utils import load_texture_pair
 
@@ -7,7 +8,7 @@ from utils import load_texture_pair
 class PlayerCharacter(arcade.Sprite):
     """Player Sprite"""
 
-    def __init__(self):
+    def __init__(self, animator):
 
         # Set up parent class
         super().__init__()
@@ -15,8 +16,6 @@ class PlayerCharacter(arcade.Sprite):
         # Default to facing right
         self.facing_direction = RIGHT_FACING
 
-        # Used for image sequences
-        self.cur_texture = 0
         self.scale = PLAYER_SCALING
 
         main_path = f"../rsc/PNG/Players/128x256/Yellow/alienYellow"
@@ -32,39 +31,33 @@ class PlayerCharacter(arcade.Sprite):
         texture = load_texture_pair(f"{main_path}_walk2.png")
         self.walk_textures.append(texture)
 
-        # Set up parent class
-        super().__init__()
-
-        # Default to facing right
-        self.facing_direction = RIGHT_FACING
-
-        # Used for image sequences
-        self.cur_texture = 0
-        self.scale = PLAYER_SCALING
-
-        main_path = f"../rsc/PNG/Players/128x256/Yellow/alienYellow"
-
-        self.idle_texture_pair = load_texture_pair(f"{main_path}_stand.png")
-        self.jump_texture_pair = load_texture_pair(f"{main_path}_jump.png")
-        self.fall_texture_pair = load_texture_pair(f"{main_path}_swim1.png")
-
-        # Load textures for walking
-        self.walk_textures = []
-        texture = load_texture_pair(f"{main_path}_walk1.png")
-        self.walk_textures.append(texture)
-        texture = load_texture_pair(f"{main_path}_walk2.png")
-        self.walk_textures.append(texture)
+        # Walk cycles facing right and left, played by the animator so they
+        # follow its clock
+        self.animator = animator
+        self.walk_clips = [
+            AnimationClip([pair[direction] for pair in self.walk_textures], PLAYER_WALK_FRAME_TICKS)
+            for direction in (RIGHT_FACING, LEFT_FACING)
+        ]
 
         # Set the initial texture
         self.texture = self.idle_texture_pair[0]
 
         # Track our state
         self.jumping = False
-        self.should_update_walk = 0
 
         # Player's inventory
         self.inventory = []
 
+    def reset(self, x, y):
+        """Put the player back at (x, y) as if just created."""
+        self.position = (x, y)
+        self.change_x = 0
+        self.change_y = 0
+        self.facing_direction = RIGHT_FACING
+        self.show(self.idle_texture_pair[0])
+        self.jumping = False
+        self.inventory = []
+
     def update_animation(self, delta_time: float = 1 / 60):
 
         # Figure out if we need to flip face left or right
@@ -75,25 +68,19 @@ class PlayerCharacter(arcade.Sprite):
 
         # Jumping animation
         if self.change_y > 0:
-            self.texture = self.jump_texture_pair[self.facing_direction]
-            return
+            self.show(self.jump_texture_pair[self.facing_direction])
         elif self.change_y < 0:
-            self.texture = self.fall_texture_pair[self.facing_direction]
-            return
+            self.show(self.fall_texture_pair[self.facing_direction])
 
         # Idle animation
-        if self.change_x == 0:
-            self.texture = self.idle_texture_pair[self.facing_direction]
-            return
+        elif self.change_x == 0:
+            self.show(self.idle_texture_pair[self.facing_direction])
 
         # Walking animation
-        # if the current frame % 3 == 0... then change the texture
-
-        if self.should_update_walk == 6:
-            self.cur_texture += 1
-            if self.cur_texture > 1:
-                self.cur_texture = 0
-            self.should_update_walk = 0
         else:
-            self.should_update_walk += 1
-        self.texture = self.walk_textures[self.cur_texture][self.facing_direction]
+            self.animator.play(self, self.walk_clips[self.facing_direction])
+
+    def show(self, texture):
+        """Stop walking and show a still texture."""
+        self.animator.stop(self)
+        self.texture = texture
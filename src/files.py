@@ -0,0 +1,89 @@
+"""
+Cache file writing and checking
+
+The caches under rsc/.cache are read by the game, the batch workers and the
+benchmark's probe processes, any of which may be writing them at the same
+time. Files are written under a temporary name in the same directory and
+moved in place, so a reader sees the old file or the whole new one, and a
+file memory-mapped by a reader is left untouched.
+
+A cache built from a source file keeps the source's mtime, size and content
+hash in a JSON meta file, written after the data. It is out of date once
+the content changed, a touched but unchanged source only updates the meta.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+
+def write_atomic(path, write, mode="w"):
+    """Write path by calling write(file) on a temporary file, then move it in place."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, mode) as file:
+            write(file)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def write_cache(path, write, check_path, write_check, mode="wb", check_mode="w"):
+    """
+    Write a cache's data, then the file its readers check first, like its
+    meta. The check last: a reader finding the new one finds the new data.
+    """
+    write_atomic(path, write, mode)
+    write_atomic(check_path, write_check, check_mode)
+
+
+def dump_meta(meta):
+    """The write function of a JSON meta file, for write_cache."""
+    return lambda file: json.dump(meta, file, default=str)
+
+
+def file_hash(file_name):
+    with open(file_name, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def source_stamp(file_name, source_hash=None):
+    """The entries of a cache's meta describing its source file."""
+    stat = os.stat(file_name)
+    return {
+        "source_mtime": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "source_hash": source_hash or file_hash(file_name),
+    }
+
+
+def read_meta(meta_path, source, **expected):
+    """
+    Return (meta, source hash) of a cache of source, meta being None when it
+    is missing, any of expected differs from it or the source changed. The
+    hash is None unless it had to be computed.
+    """
+    try:
+        with open(meta_path) as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None, None
+    if any(meta.get(name) != value for name, value in expected.items()):
+        return None, None
+
+    stat = os.stat(source)
+    if (meta["source_mtime"], meta["source_size"]) == (stat.st_mtime_ns, stat.st_size):
+        return meta, None
+
+    # Touched but maybe not edited, only the content decides
+    source_hash = file_hash(source)
+    if source_hash != meta["source_hash"]:
+        return None, source_hash
+    meta["source_mtime"] = stat.st_mtime_ns
+    meta["source_size"] = stat.st_size
+    write_atomic(meta_path, dump_meta(meta))
+    return meta, source_hash
@@ -2,11 +2,20 @@
 Platformer Game
 """
 
+import os
+
 import arcade
 import arcade.gui
 
+from assets import registry
 from constants import *
-from ui import GameView
+from level_cache import read_level
+from preload import Preloader
+from ui import GameView, asset_jobs
+
+# Textures uploaded to the GPU, then level sprite lists given their OpenGL
+# buffers, per menu frame once the assets are loaded
+UPLOADS_PER_FRAME = 8
 
 
 class MainMenu(arcade.View):
@@ -17,7 +26,23 @@ class MainMenu(arcade.View):
 
         self.manager = arcade.gui.UIManager()
         # arcade.set_background_color(arcade.color.WHITE)
-        self.background = arcade.load_texture("rsc/PNG/Menu/Main_menu.jpg")
+        # Held from the asset registry while the menu is shown
+        self.background = None
+
+        # Resource paths are relative to the src directory, the level built
+        # in the background changes to it too
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+        # Compiling the level creates OpenGL sprite lists, so when its cache
+        # is stale it is compiled here rather than by the preloader
+        read_level(LEVELS[0], TILE_SCALING)
+
+        # Load the game in the background while the menu is up
+        self.preloader = Preloader(asset_jobs())
+        self.preloader.start()
+        self.game_view = None
+
+        self.loading_text = arcade.Text("", 20, 20, arcade.color.WHITE, 15)
 
         start_button_style = {
             "font_name": ("time new roman", "arial"),
@@ -52,9 +77,7 @@ class MainMenu(arcade.View):
         # Initialise the button with an on_click event.
         @start_button.event("on_click")
         def on_click_start_button(event):
-            # Passing the main view into menu view as an argument.
-            game_view = GameView()
-            self.window.show_view(game_view)
+            self.start_game()
 
 
         @quit_button.event("on_click")
@@ -81,13 +104,40 @@ class MainMenu(arcade.View):
             )
         )
 
+    def start_game(self):
+        """Show the game, building its view if loading isn't done with it."""
+        # Passing the main view into menu view as an argument.
+        if self.game_view is None:
+            self.game_view = GameView(self.preloader.wait())
+        self.window.show_view(self.game_view)
+
     def on_show_view(self):
         """Called when switching to this view."""
 
         self.manager.enable()
+        self.background = registry.texture("../rsc/PNG/Menu/Main_menu.jpg")
 
     def on_hide_view(self):
         self.manager.disable()
+        registry.release(self.background)
+        self.background = None
+
+    def on_update(self, delta_time):
+        """Finish loading the game on the main thread, a little every frame."""
+        if self.game_view is not None:
+            return
+
+        self.loading_text.text = f"Loading {self.preloader.progress:.0%}"
+        if not self.preloader.done:
+            return
+
+        if not self.preloader.upload(UPLOADS_PER_FRAME):
+            return
+        assets = self.preloader.wait()
+        if assets["level"].initialize(UPLOADS_PER_FRAME):
+            self.game_view = GameView(assets)
+            self.game_view.prepare()
+            self.loading_text.text = ""
 
     def on_draw(self):
         """Draw the menu"""
@@ -99,6 +149,7 @@ class MainMenu(arcade.View):
         )
 
         self.manager.draw()
+        self.loading_text.draw()
 
 
 def main():
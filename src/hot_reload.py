@@ -0,0 +1,166 @@
+"""
+Map hot reload
+
+For level design: with HOT_RELOAD set, the game watches its map file and,
+when it is saved, patches the running level with what changed instead of
+loading it again. The new JSON is compared with the last one layer by
+layer, then in a changed layer tile by tile (by cell) and object by object
+(by id). Only the tiles and objects that changed are built, from a map
+holding nothing else, and swapped for the sprites they replace. The player
+stays where they are, with what they carry.
+
+Anything else changing (tilesets, the map's size, layers added, removed or
+reordered, encoded tile data) can't be patched and needs a restart.
+"""
+
+import json
+import os
+import tempfile
+import warnings
+
+import arcade
+
+from constants import *
+
+
+def _stat(file_name):
+    stat = os.stat(file_name)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _items(layer):
+    """
+    Key -> content of the tiles or objects of a layer that are built as
+    sprites, in the order arcade builds them. None when the layer can't be
+    patched.
+    """
+    if layer["type"] == "tilelayer" and isinstance(layer.get("data"), list):
+        return {cell: gid for cell, gid in enumerate(layer["data"]) if gid != 0}
+    if layer["type"] == "objectgroup":
+        return {tiled_object["id"]: tiled_object for tiled_object in layer["objects"] if "gid" in tiled_object}
+    return None
+
+
+def _attributes(layer):
+    # Everything about a layer but its tiles and objects
+    return {key: value for key, value in layer.items() if key not in ("data", "objects")}
+
+
+class MapReloader:
+    """Watches a map file and tells which sprites its edits replace"""
+
+    def __init__(self, map_name, scaling=TILE_SCALING):
+        self.map_name = os.path.abspath(map_name)
+        self.scaling = scaling
+        self.stat = _stat(self.map_name)
+        with open(self.map_name) as file:
+            self.data = json.load(file)
+
+        # (layer name, cell or object id) -> sprite built for it
+        self.sprites = {}
+
+    def bind(self, layers):
+        """
+        Match the sprites of a level freshly loaded from the map, given as
+        layer name -> its sprites in load order, to their tiles and objects.
+        """
+        for layer in self.data["layers"]:
+            items = _items(layer)
+            sprites = layers.get(layer["name"])
+            if items is None or sprites is None or len(items) != len(sprites):
+                continue
+            self.sprites.update({(layer["name"], key): sprite for key, sprite in zip(items, sprites)})
+
+    def poll(self):
+        """
+        Read the map again if it was saved since the last poll. Returns
+        {layer name: (sprites removed, sprites added)}, empty when nothing
+        changed or the changes can't be patched.
+        """
+        try:
+            stat = _stat(self.map_name)
+            if stat == self.stat:
+                return {}
+            with open(self.map_name) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            # Still being written, try again next time
+            return {}
+        self.stat = stat
+
+        old_layers = {layer["name"]: layer for layer in self.data["layers"]}
+        new_layers = {layer["name"]: layer for layer in data["layers"]}
+        if ({key: value for key, value in data.items() if key != "layers"}
+                != {key: value for key, value in self.data.items() if key != "layers"}
+                or list(old_layers) != list(new_layers)):
+            warnings.warn("Map reload: more than the layers' content changed, restart to see it")
+            self.data = data
+            return {}
+
+        # Layer name -> (keys removed, {key: content} added)
+        edits = {}
+        for name, layer in new_layers.items():
+            old_layer = old_layers[name]
+            if layer == old_layer:
+                continue
+            old_items, new_items = _items(old_layer), _items(layer)
+            if old_items is None or new_items is None:
+                warnings.warn(f"Map reload: layer '{name}' can't be patched, restart to see it")
+                continue
+            if _attributes(layer) != _attributes(old_layer):
+                # The whole layer is built again
+                edits[name] = (list(old_items), new_items)
+                continue
+            removed = [key for key, item in old_items.items() if new_items.get(key) != item]
+            added = {key: item for key, item in new_items.items() if old_items.get(key) != item}
+            edits[name] = (removed, added)
+
+        self.data = data
+        if not edits:
+            return {}
+
+        built = self._build(data, edits)
+        changes = {}
+        for name, (removed, added) in edits.items():
+            removed_sprites = [self.sprites.pop((name, key)) for key in removed if (name, key) in self.sprites]
+            added_sprites = []
+            for key, sprite in zip(added, built.get(name, [])):
+                self.sprites[(name, key)] = sprite
+                added_sprites.append(sprite)
+            changes[name] = (removed_sprites, added_sprites)
+        return changes
+
+    def _build(self, data, edits):
+        """Build the sprites of the tiles and objects added, by layer name, in order."""
+        map_directory = os.path.dirname(self.map_name)
+        layers = []
+        for layer in data["layers"]:
+            if layer["name"] not in edits:
+                continue
+            _, added = edits[layer["name"]]
+            if layer["type"] == "tilelayer":
+                layers.append(dict(layer, data=[gid if cell in added else 0 for cell, gid in enumerate(layer["data"])]))
+            else:
+                layers.append(dict(layer, objects=list(added.values())))
+
+        # Written elsewhere, so the tileset files and images are given with
+        # the same absolute paths the level was loaded with
+        tilesets = [
+            {key: os.path.normpath(os.path.join(map_directory, value)) if key in ("image", "source") else value
+             for key, value in tileset.items()}
+            for tileset in data["tilesets"]
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as file:
+            # dumps encodes in one go, dump goes through the slow Python encoder
+            file.write(json.dumps(dict(data, layers=layers, tilesets=tilesets)))
+        try:
+            tile_map = arcade.load_tilemap(file.name, self.scaling)
+        finally:
+            os.remove(file.name)
+
+        built = {}
+        for name, sprite_list in tile_map.sprite_lists.items():
+            built[name] = list(sprite_list)
+            # Only the scene's lists should hold them
+            sprite_list.clear()
+        return built
@@ -0,0 +1,112 @@
+"""
+Retained-mode HUD
+
+The score, the action text and the inventory icon are kept as arcade.Text
+objects and sprites, and only touched when what they show changes.
+"""
+
+import arcade
+
+from assets import registry
+from constants import *
+
+
+class Hud:
+    """Score, action text and inventory icon drawn over the game"""
+
+    def __init__(self, name_to_texture):
+        self.name_to_texture = name_to_texture
+
+        # Last values shown, to skip updates when nothing changed
+        self.score = None
+        self.action = None
+        self.inventory_color = None
+
+        self.sprite_list = arcade.SpriteList()
+
+        coin_texture = registry.texture("../rsc/PNG/Items/coinGold.png")
+        coin = arcade.Sprite(texture=coin_texture)
+        coin.width = coin_texture.width / 2
+        coin.height = coin_texture.height / 2
+        coin.position = (30, 40)
+        self.sprite_list.append(coin)
+
+        self.inventory_sprite = arcade.Sprite(texture=name_to_texture["bomb"])
+        self.inventory_sprite.visible = False
+        self.sprite_list.append(self.inventory_sprite)
+
+        self.score_text = arcade.Text(
+            "",
+            55,
+            32,
+            arcade.csscolor.BLACK,
+            18,
+            font_name=("Kenney Mini Square")
+        )
+
+        self.action_text = arcade.Text(
+            "",
+            SCREEN_WIDTH / 2 - 200,
+            SCREEN_HEIGHT - 100,
+            arcade.color.BLACK,
+            25,
+            font_name=("Kenney Mini Square"),
+            multiline=True,
+            width=700
+        )
+
+    def update(self, score, action, inventory):
+        """Bring the HUD up to date with the game state."""
+
+        if score != self.score:
+            self.score = score
+            self.score_text.text = score
+
+        if action != self.action:
+            self.action = action
+            self.action_text.text = action
+
+        inventory_color = inventory[0].properties["color"] if len(inventory) == 1 else None
+        if inventory_color != self.inventory_color:
+            self.inventory_color = inventory_color
+            if inventory_color is None:
+                self.inventory_sprite.visible = False
+            else:
+                image = self.name_to_texture[inventory_color]
+                self.inventory_sprite.texture = image
+                self.inventory_sprite.position = (image.width // 2, image.height)
+                self.inventory_sprite.visible = True
+
+    def draw(self):
+        self.sprite_list.draw()
+        self.score_text.draw()
+        self.action_text.draw()
+
+
+class ProfileOverlay:
+    """Mean time of each frame phase, from the profiler, in a corner of the screen"""
+
+    def __init__(self, profiler, refresh_frames=30):
+        self.profiler = profiler
+        self.refresh_frames = refresh_frames
+        self.visible = False
+
+        self.text = arcade.Text(
+            "",
+            10,
+            SCREEN_HEIGHT - 20,
+            arcade.color.BLACK,
+            11,
+            multiline=True,
+            width=300,
+            anchor_y="top"
+        )
+
+    def draw(self):
+        if not self.visible:
+            return
+        # Laying out the text again every frame would cost more than what it shows
+        if self.profiler.frame % self.refresh_frames == 0 or not self.text.text:
+            summary = self.profiler.summary()
+            self.text.text = "\n".join(f"{name}: {milliseconds:.2f} ms" for name, milliseconds in summary.items())
+        self.text.draw()
@@ -0,0 +1,57 @@
+"""
+Decoded image cache
+
+Decoding PNGs and JPEGs is most of the startup time. The first time an
+image is opened its RGBA pixels are written as a raw .npy array in
+rsc/.cache/images; later runs memory-map that file and wrap it as a PIL
+image without decoding anything.
+
+Each cached image is keyed by its source path and checked against the
+source's mtime and size, then its content hash when those changed (see
+files.py).
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import PIL.Image
+
+from files import dump_meta, read_meta, source_stamp, write_cache
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+IMAGE_CACHE_DIRECTORY = os.path.join(SOURCE_DIRECTORY, "..", "rsc", ".cache", "images")
+
+# Bump when the layout of the cache files changes
+IMAGE_CACHE_VERSION = 1
+
+
+def _cache_paths(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    key = hashlib.sha1(path.encode()).hexdigest()[:16]
+    base = os.path.join(IMAGE_CACHE_DIRECTORY, f"{name}-{key}")
+    return f"{base}.rgba.npy", f"{base}.json"
+
+
+def _write(path, pixels_path, meta_path, source_hash):
+    meta = {"version": IMAGE_CACHE_VERSION, "source": path, **source_stamp(path, source_hash)}
+    image = PIL.Image.open(path).convert("RGBA")
+    write_cache(pixels_path, lambda file: np.save(file, np.asarray(image)), meta_path, dump_meta(meta))
+    return image
+
+
+def open_rgba(file_name):
+    """
+    Open an image as RGBA, from its cached pixels when they are up to date.
+    The image returned may be read only, copy it before drawing on it.
+    """
+    path = os.path.normpath(os.path.abspath(file_name))
+    pixels_path, meta_path = _cache_paths(path)
+
+    meta, source_hash = read_meta(meta_path, path, version=IMAGE_CACHE_VERSION)
+    if meta is None or not os.path.exists(pixels_path):
+        return _write(path, pixels_path, meta_path, source_hash)
+
+    pixels = np.load(pixels_path, mmap_mode="r")
+    height, width, _ = pixels.shape
+    return PIL.Image.frombuffer("RGBA", (width, height), pixels, "raw", "RGBA", 0, 1)
@@ -0,0 +1,300 @@
+"""
+Compiled level cache
+
+Turns a Tiled JSON map into a flat NumPy record array (one record per sprite
+with its layer, texture, position, size and motion) plus a small JSON file of
+interned textures, hit boxes and properties. The records are memory-mapped on
+load and the sprites are rebuilt from them without parsing the map or
+computing any hit box. The cache is keyed by the map's mtime and content hash.
+"""
+
+import json
+import os
+from collections import OrderedDict
+
+import arcade
+import numpy as np
+import pytiled_parser
+from arcade.tilemap.tilemap import _get_image_info_from_tileset, _get_image_source
+
+from assets import registry
+from files import dump_meta, read_meta, source_stamp, write_cache
+
+# Bump when the layout of the cache files changes
+CACHE_VERSION = 1
+
+# Where compiled levels are written, relative to the map file
+CACHE_DIRECTORY = ".cache"
+
+RECORD_DTYPE = np.dtype([
+    ("layer", "i2"),
+    ("texture", "i4"),
+    ("hit_box", "i4"),
+    ("properties", "i4"),
+    ("center_x", "f8"),
+    ("center_y", "f8"),
+    ("width", "f8"),
+    ("height", "f8"),
+    ("scale", "f8"),
+    ("angle", "f8"),
+    ("change_x", "f8"),
+    ("change_y", "f8"),
+    # NaN when the sprite has no boundary
+    ("boundary_left", "f8"),
+    ("boundary_right", "f8"),
+    ("boundary_top", "f8"),
+    ("boundary_bottom", "f8"),
+    ("color", "u1", 3),
+    ("alpha", "u1"),
+])
+
+# Levels already loaded in this process, by map path
+_loaded = {}
+
+
+class CompiledLevel:
+    """
+    Stands in for arcade.TileMap: same map attributes and one SpriteList per
+    layer, made into a Scene by to_scene.
+    """
+
+    def __init__(self, meta):
+        self.width = meta["width"]
+        self.height = meta["height"]
+        self.tile_width = meta["tile_width"]
+        self.tile_height = meta["tile_height"]
+        self.properties = meta["properties"]
+        self.sprite_lists = OrderedDict()
+        self.object_lists = OrderedDict()
+
+        # Textures of the tiles, held from the asset registry
+        self.textures = []
+
+    def to_scene(self):
+        return level_scene(self)
+
+
+def level_scene(level):
+    """
+    Scene of a level's layers, the very sprite lists in their order.
+    arcade.Scene.from_tilemap would swap the empty ones for new lists, not
+    lazy and without the layer's options.
+    """
+    scene = arcade.Scene()
+    for name, sprite_list in level.sprite_lists.items():
+        scene.name_mapping[name] = sprite_list
+        scene.sprite_lists.append(sprite_list)
+    return scene
+
+
+def _cache_paths(map_name):
+    directory, file_name = os.path.split(map_name)
+    base = os.path.join(directory, CACHE_DIRECTORY, os.path.splitext(file_name)[0])
+    return f"{base}.level.npy", f"{base}.level.json"
+
+
+def _layer_gids(layers):
+    """Yield (layer name, gids of its tile sprites) in the order arcade builds them."""
+    for layer in layers:
+        if isinstance(layer, pytiled_parser.TileLayer):
+            yield layer.name, [gid for row in layer.data for gid in row if gid != 0]
+        elif isinstance(layer, pytiled_parser.ObjectLayer):
+            yield layer.name, [tiled_object.gid for tiled_object in layer.tiled_objects
+                               if isinstance(tiled_object, pytiled_parser.tiled_object.Tile)]
+        elif isinstance(layer, pytiled_parser.LayerGroup):
+            yield from _layer_gids(layer.layers)
+        else:
+            raise ValueError(f"Layer '{layer.name}' of type {type(layer).__name__} can't be compiled")
+
+
+def _nan_if_none(value):
+    return np.nan if value is None else value
+
+
+def _none_if_nan(value):
+    return None if value != value else value
+
+
+def _intern(table, index, value):
+    key = json.dumps(value, sort_keys=True, default=str)
+    if key not in index:
+        index[key] = len(table)
+        table.append(value)
+    return index[key]
+
+
+def compile_level(map_name, scaling, source_hash=None):
+    """Build the cache files for a map and return (records, meta)."""
+    stamp = source_stamp(map_name, source_hash)
+    tile_map = arcade.load_tilemap(map_name, scaling)
+    map_directory = os.path.dirname(tile_map.tiled_map.map_file)
+
+    layers = []
+    textures = []
+    texture_index = {}
+    hit_boxes = []
+    hit_box_index = {}
+    properties = []
+    properties_index = {}
+    rows = []
+
+    for name, gids in _layer_gids(tile_map.tiled_map.layers):
+        if name not in tile_map.sprite_lists:
+            continue
+        sprite_list = tile_map.sprite_lists[name]
+        layer_id = len(layers)
+        layers.append({
+            "name": name,
+            "visible": sprite_list.visible,
+            "properties": sprite_list.properties,
+        })
+
+        for gid, sprite in zip(gids, sprite_list):
+            tile = tile_map._get_tile_by_gid(gid)
+            if tile.animation:
+                raise ValueError(f"Animated tile {gid} in layer '{name}' can't be compiled")
+            image_x, image_y, width, height = _get_image_info_from_tileset(tile)
+            texture = [str(_get_image_source(tile, map_directory)), image_x, image_y, width, height,
+                       tile.flipped_horizontally, tile.flipped_vertically, tile.flipped_diagonally]
+
+            hit_box = [list(point) for point in sprite.get_hit_box()]
+
+            rows.append((
+                layer_id,
+                _intern(textures, texture_index, texture),
+                _intern(hit_boxes, hit_box_index, hit_box),
+                _intern(properties, properties_index, sprite.properties),
+                sprite.center_x,
+                sprite.center_y,
+                sprite.width,
+                sprite.height,
+                sprite.scale,
+                sprite.angle,
+                sprite.change_x,
+                sprite.change_y,
+                _nan_if_none(sprite.boundary_left),
+                _nan_if_none(sprite.boundary_right),
+                _nan_if_none(sprite.boundary_top),
+                _nan_if_none(sprite.boundary_bottom),
+                sprite.color[:3],
+                sprite.alpha,
+            ))
+
+    meta = {
+        "version": CACHE_VERSION,
+        "scaling": scaling,
+        **stamp,
+        "width": tile_map.width,
+        "height": tile_map.height,
+        "tile_width": tile_map.tile_width,
+        "tile_height": tile_map.tile_height,
+        "properties": tile_map.properties,
+        "layers": layers,
+        "textures": textures,
+        "hit_boxes": hit_boxes,
+        "sprite_properties": properties,
+    }
+    records = np.array(rows, dtype=RECORD_DTYPE)
+
+    records_path, meta_path = _cache_paths(map_name)
+    write_cache(records_path, lambda file: np.save(file, records), meta_path, dump_meta(meta))
+
+    return records, meta
+
+
+def _read_cache(map_name, scaling):
+    """Return (records, meta) for a map, compiling it again if it changed."""
+    records_path, meta_path = _cache_paths(map_name)
+    meta, source_hash = read_meta(meta_path, map_name, version=CACHE_VERSION, scaling=scaling)
+
+    if meta is None or not os.path.exists(records_path):
+        compile_level(map_name, scaling, source_hash)
+        with open(meta_path) as file:
+            meta = json.load(file)
+
+    return np.load(records_path, mmap_mode="r"), meta
+
+
+def level_textures(meta):
+    """The textures of a level, held from the asset registry until released."""
+    return registry.tile_textures(meta["textures"])
+
+
+def read_level(map_name, scaling=1.0):
+    """Return the (records, meta) of a map, through the cache and the levels already loaded."""
+    map_name = os.path.abspath(map_name)
+    stat = os.stat(map_name)
+    key = (stat.st_mtime_ns, stat.st_size, scaling)
+
+    if map_name in _loaded and _loaded[map_name][0] == key:
+        _, records, meta = _loaded[map_name]
+    else:
+        records, meta = _read_cache(map_name, scaling)
+        _loaded[map_name] = (key, records, meta)
+    return records, meta
+
+
+def layer_sprite_lists(level, meta, layer_options=None, lazy=False):
+    """
+    Add an empty SpriteList per layer of meta to level, return them in layer
+    order. Lazy lists get no OpenGL buffers until first drawn.
+    """
+    layer_options = layer_options or {}
+    sprite_lists = []
+    for layer in meta["layers"]:
+        use_spatial_hash = layer_options.get(layer["name"], {}).get("use_spatial_hash")
+        sprite_list = arcade.SpriteList(use_spatial_hash=use_spatial_hash, lazy=lazy)
+        sprite_list.visible = layer["visible"]
+        sprite_list.properties = layer["properties"]
+        level.sprite_lists[layer["name"]] = sprite_list
+        sprite_lists.append(sprite_list)
+    return sprite_lists
+
+
+def build_sprite(record, textures, hit_boxes, meta):
+    """Build the sprite of a record, given as a list, with the level's textures and hit boxes."""
+    (layer, texture, hit_box, properties, center_x, center_y, width, height, scale, angle,
+     change_x, change_y, boundary_left, boundary_right, boundary_top, boundary_bottom,
+     color, alpha) = record
+
+    sprite = arcade.Sprite(texture=textures[texture], scale=scale)
+    sprite.width = width
+    sprite.height = height
+    sprite.hit_box = hit_boxes[hit_box]
+    sprite.position = (center_x, center_y)
+    sprite.angle = angle
+    sprite.change_x = change_x
+    sprite.change_y = change_y
+    sprite.boundary_left = _none_if_nan(boundary_left)
+    sprite.boundary_right = _none_if_nan(boundary_right)
+    sprite.boundary_top = _none_if_nan(boundary_top)
+    sprite.boundary_bottom = _none_if_nan(boundary_bottom)
+    sprite.color = tuple(color)
+    sprite.alpha = alpha
+    sprite.properties = dict(meta["sprite_properties"][properties])
+    return sprite
+
+
+def level_hit_boxes(meta):
+    return [tuple(tuple(point) for point in hit_box) for hit_box in meta["hit_boxes"]]
+
+
+def load_level(map_name, scaling=1.0, layer_options=None, lazy=False):
+    """
+    Load a map through the cache, same arguments as arcade.load_tilemap.
+
+    Only the use_spatial_hash layer option is supported. With lazy set the
+    sprite lists touch no OpenGL, see layer_sprite_lists.
+    """
+    records, meta = read_level(map_name, scaling)
+
+    level = CompiledLevel(meta)
+    sprite_lists = layer_sprite_lists(level, meta, layer_options, lazy)
+    level.textures = level_textures(meta)
+    hit_boxes = level_hit_boxes(meta)
+
+    # Plain Python values are much faster to work with than NumPy scalars
+    for record in records.tolist():
+        sprite_lists[record[0]].append(build_sprite(record, level.textures, hit_boxes, meta))
+
+    return level
@@ -0,0 +1,132 @@
+"""
+Level sequence
+
+The maps of LEVELS are played in turn, reaching the exit of one starting
+the next. While a level is played the next one is built on a worker
+thread: its compiled records read, its textures decoded, its simulation set
+up and its scene split into chunks, all into lazy sprite lists so nothing
+touches OpenGL. Once it is built the main thread gives its sprite lists
+their OpenGL buffers a few per frame, and going through the exit only
+swaps one simulation for the other.
+
+The last LEVEL_CACHE_SIZE levels played or built ahead stay in an LRU
+cache, going back to one of them only restores its snapshot.
+"""
+
+from collections import OrderedDict
+
+from constants import *
+from culling import ChunkedScene
+from level_cache import read_level
+from preload import Preloader
+from simulation import GameSimulation
+
+
+class Level:
+    """A level's simulation and the chunked scene drawing it"""
+
+    def __init__(self, map_name, simulation, chunked_scene=None):
+        self.map_name = map_name
+        self.simulation = simulation
+        self.chunked_scene = chunked_scene
+
+        # Lazy sprite lists still without their OpenGL buffers
+        self.uninitialized = []
+
+    def sprite_lists(self):
+        """Every sprite list the level is drawn with."""
+        sprite_lists = [*self.simulation.scene.sprite_lists, self.simulation.bombs.sprite_list]
+        if self.chunked_scene is not None:
+            for _, chunks, _ in self.chunked_scene.layers:
+                sprite_lists += (chunks or {}).values()
+        return sprite_lists
+
+    def initialize(self, count=None):
+        """
+        Create the OpenGL buffers of up to count of the lazy sprite lists,
+        all of them by default. Call from the main thread.
+
+        Returns True when every list is initialized.
+        """
+        while self.uninitialized and count != 0:
+            self.uninitialized.pop().initialize()
+            if count is not None:
+                count -= 1
+        return not self.uninitialized
+
+
+def build_level(map_name, streaming=False):
+    """
+    Build a level ready to play without touching OpenGL, so on any thread
+    once the map is compiled (see level_cache.read_level).
+    """
+    simulation = GameSimulation(map_name, streaming, lazy=True)
+    simulation.setup()
+    chunked_scene = None if streaming else ChunkedScene(simulation.scene)
+    level = Level(map_name, simulation, chunked_scene)
+    level.uninitialized = level.sprite_lists()
+    return level
+
+
+class LevelCache:
+    """Levels built, by map name, and the ones being built ahead"""
+
+    def __init__(self, capacity=LEVEL_CACHE_SIZE, streaming=False):
+        self.capacity = capacity
+        self.streaming = streaming
+
+        # Map name -> Level, least recently used first
+        self.levels = OrderedDict()
+
+        # Map name -> Preloader building it
+        self.building = {}
+
+    def prefetch(self, map_name):
+        """Start building a level on a worker thread, unless it is cached or already being built."""
+        if map_name in self.levels or map_name in self.building:
+            return
+        # Compiling a map creates OpenGL sprite lists, so a stale one is
+        # compiled here, on the main thread
+        read_level(map_name, TILE_SCALING)
+        preloader = Preloader([(map_name, lambda: build_level(map_name, self.streaming))])
+        preloader.start()
+        self.building[map_name] = preloader
+
+    def update(self, count=LEVEL_LISTS_PER_FRAME):
+        """
+        Cache the levels built since the last call and initialize up to
+        count of their sprite lists. Call once per frame from the main thread.
+        """
+        for map_name in [map_name for map_name, preloader in self.building.items() if preloader.done]:
+            self._finish(map_name)
+        for level in self.levels.values():
+            if level.uninitialized:
+                level.initialize(count)
+                return
+
+    def get(self, map_name):
+        """
+        Return the level of a map ready to draw, from the cache, waiting
+        for it to be built or building it now. It becomes the most recently
+        used.
+        """
+        if map_name in self.building:
+            self._finish(map_name)
+        if map_name not in self.levels:
+            self.put(build_level(map_name, self.streaming))
+        self.levels.move_to_end(map_name)
+        level = self.levels[map_name]
+        level.initialize()
+        return level
+
+    def put(self, level):
+        """Cache a level as the most recently used, dropping the least recently used over capacity."""
+        self.levels[level.map_name] = level
+        self.levels.move_to_end(level.map_name)
+        while len(self.levels) > self.capacity:
+            _, dropped = self.levels.popitem(last=False)
+            dropped.simulation.close()
+
+    def _finish(self, map_name):
+        level = self.building.pop(map_name).wait()[map_name]
+        self.put(level)
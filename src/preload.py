@@ -0,0 +1,82 @@
+"""
+Asset preloading
+
+Runs a list of loading jobs on a worker thread, so sounds and images are
+decoded while the main menu is shown. The jobs must not touch OpenGL, the
+textures they return are uploaded to the GPU by upload(), called from the
+main thread.
+"""
+
+import threading
+
+import arcade
+
+
+def _textures(asset):
+    if isinstance(asset, arcade.Texture):
+        return [asset]
+    if isinstance(asset, (list, tuple)):
+        return [texture for item in asset for texture in _textures(item)]
+    return []
+
+
+class Preloader:
+    """Loads named assets on a worker thread"""
+
+    def __init__(self, jobs):
+        # (name, function returning the asset)
+        self.jobs = list(jobs)
+
+        # Assets loaded so far, by name
+        self.assets = {}
+        self.loaded = 0
+        self.error = None
+
+        # Textures still to upload to the GPU
+        self.pending_uploads = None
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def _run(self):
+        try:
+            for name, job in self.jobs:
+                self.assets[name] = job()
+                self.loaded += 1
+        except Exception as error:
+            self.error = error
+
+    @property
+    def progress(self):
+        """Fraction of the jobs done, between 0 and 1."""
+        return self.loaded / len(self.jobs) if self.jobs else 1
+
+    @property
+    def done(self):
+        return not self.thread.is_alive() and (self.loaded == len(self.jobs) or self.error is not None)
+
+    def wait(self):
+        """Block until every job ran and return the assets."""
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.assets
+
+    def upload(self, count=None):
+        """
+        Upload up to count of the loaded textures to the GPU texture atlas,
+        all of them by default. Call from the main thread once done.
+
+        Returns True when every texture is uploaded.
+        """
+        if self.pending_uploads is None:
+            self.pending_uploads = [texture for asset in self.wait().values() for texture in _textures(asset)]
+
+        atlas = arcade.get_window().ctx.default_atlas
+        while self.pending_uploads and count != 0:
+            atlas.add(self.pending_uploads.pop())
+            if count is not None:
+                count -= 1
+        return not self.pending_uploads
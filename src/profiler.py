@@ -0,0 +1,152 @@
+"""
+Frame-phase profiler
+
+Times the phases of each frame (physics, collisions, animations, drawing...)
+into a ring buffer, to show them on screen and to dump them as Chrome trace
+events, which chrome://tracing or https://ui.perfetto.dev can open.
+
+Switched on by the PROFILE environment variable or the --profile flag.
+PROFILE can name the trace file, trace.json by default, written when the
+program exits. When off, phase() hands back one shared do-nothing context
+manager, so instrumented code costs about nothing.
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import sys
+import time
+
+# Phases kept, older ones are overwritten
+PROFILE_CAPACITY = 1 << 16
+
+DEFAULT_TRACE_FILE = "trace.json"
+
+
+class _Phase:
+    """Times one named phase into a profiler"""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.name, self.start, time.perf_counter_ns())
+
+
+class Profiler:
+    """Ring buffer of timed phases"""
+
+    enabled = True
+
+    def __init__(self, capacity=PROFILE_CAPACITY):
+        self.capacity = capacity
+
+        # Ring buffer of phases, count being how many were ever added
+        self.names = [None] * capacity
+        self.starts = [0] * capacity
+        self.ends = [0] * capacity
+        self.frames = [0] * capacity
+        self.count = 0
+
+        self.frame = 0
+        self._phases = {}
+
+    def phase(self, name):
+        """Context manager timing a phase of the current frame."""
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(self, name)
+        return phase
+
+    def add(self, name, start, end):
+        index = self.count % self.capacity
+        self.names[index] = name
+        self.starts[index] = start
+        self.ends[index] = end
+        self.frames[index] = self.frame
+        self.count += 1
+
+    def next_frame(self):
+        self.frame += 1
+
+    def _recent(self):
+        # Indexes of the phases still in the buffer, oldest first
+        first = max(0, self.count - self.capacity)
+        return [index % self.capacity for index in range(first, self.count)]
+
+    def summary(self, frames=60):
+        """Return {phase: mean milliseconds per frame} over the last frames."""
+        totals = {}
+        oldest = self.frame - frames
+        for index in self._recent():
+            if self.frames[index] > oldest:
+                name = self.names[index]
+                totals[name] = totals.get(name, 0) + self.ends[index] - self.starts[index]
+        return {name: total / frames / 1e6 for name, total in totals.items()}
+
+    def export(self, file_name):
+        """Write the phases in the buffer as Chrome trace events."""
+        recent = self._recent()
+        origin = self.starts[recent[0]] if recent else 0
+        events = [
+            {
+                "name": self.names[index],
+                "ph": "X",
+                "ts": (self.starts[index] - origin) / 1000,
+                "dur": (self.ends[index] - self.starts[index]) / 1000,
+                "pid": 0,
+                "tid": 0,
+                "args": {"frame": self.frames[index]},
+            }
+            for index in recent
+        ]
+        with open(file_name, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+class NullProfiler:
+    """Stands in for Profiler when profiling is off"""
+
+    enabled = False
+
+    _phase = contextlib.nullcontext()
+
+    def phase(self, name):
+        return self._phase
+
+    def next_frame(self):
+        pass
+
+    def summary(self, frames=60):
+        return {}
+
+    def export(self, file_name):
+        pass
+
+
+def _trace_file():
+    setting = os.environ.get("PROFILE", "")
+    for argument in sys.argv[1:]:
+        if argument.startswith("--profile"):
+            setting = argument.partition("=")[2] or setting or "1"
+    if setting in ("", "0"):
+        return None
+    # Resolved now, the game changes directory later
+    return os.path.abspath(setting if setting.endswith(".json") else DEFAULT_TRACE_FILE)
+
+
+TRACE_FILE = _trace_file()
+
+# The profiler every module times its phases with
+profiler = Profiler() if TRACE_FILE else NullProfiler()
+
+if TRACE_FILE:
+    atexit.register(profiler.export, TRACE_FILE)
@@ -0,0 +1,175 @@
+"""
+Input recording and replay
+
+A Recording holds the inputs given to a GameSimulation, stamped with the
+tick they were applied before, and the state the run ended in. It is saved
+as a small binary file: a header, the map name, the end state and then five
+bytes per input. Replaying feeds the inputs back at the fixed tick rate,
+in real time or as fast as possible, and checks the run ends the same way.
+
+Run this file with a recording to replay it:
+    python replay.py run.rec [--realtime]
+"""
+
+import struct
+import sys
+import time
+
+from constants import *
+from simulation import GameSimulation
+
+MAGIC = b"GJRP"
+VERSION = 1
+
+# Magic, version, held inputs, restart x and y, input count
+HEADER = struct.Struct("<4sBBddI")
+# Map name length
+NAME = struct.Struct("<H")
+# Tick, score, outcome, player x and y
+END = struct.Struct("<IiBdd")
+# Tick, action and pressed
+EVENT = struct.Struct("<IB")
+
+# Codes of the actions and outcomes in the file
+ACTIONS = [INPUT_JUMP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT, INPUT_USE, INPUT_DROP, INPUT_OTHER]
+OUTCOMES = [None, OUTCOME_ENEMY, OUTCOME_WATER, OUTCOME_WIN]
+
+# Inputs that stay held through a setup, bit of each in the header
+HELD_USE = 1
+HELD_DROP = 2
+
+
+def end_state(simulation):
+    """What a replay has to reproduce: (tick, score, outcome, x, y)."""
+    player = simulation.player_sprite
+    return simulation.tick, simulation.score, simulation.outcome, player.center_x, player.center_y
+
+
+class Recording:
+    """Inputs of one run, from a setup to its end"""
+
+    def __init__(self, map_name=MAP_NAME, restart_x=None, restart_y=None, held=0):
+        self.map_name = map_name
+        self.restart_x = restart_x
+        self.restart_y = restart_y
+        self.held = held
+
+        # (tick, action, pressed)
+        self.events = []
+
+        # end_state of the run, once finished
+        self.end = None
+
+    @classmethod
+    def start(cls, simulation):
+        """Start recording a simulation that was just set up."""
+        held = (HELD_USE if simulation.e_pressed else 0) | (HELD_DROP if simulation.a_pressed else 0)
+        recording = cls(simulation.map_name, simulation.restart_x, simulation.restart_y, held)
+        simulation.recording = recording
+        return recording
+
+    def record(self, tick, action, pressed):
+        self.events.append((tick, action, pressed))
+
+    def finish(self, simulation):
+        """Stop recording and keep the state the run ended in."""
+        simulation.recording = None
+        self.end = end_state(simulation)
+
+    def save(self, file_name):
+        name = self.map_name.encode()
+        tick, score, outcome, x, y = self.end
+        with open(file_name, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.held, self.restart_x, self.restart_y, len(self.events)))
+            file.write(NAME.pack(len(name)) + name)
+            file.write(END.pack(tick, score, OUTCOMES.index(outcome), x, y))
+            file.write(b"".join(
+                EVENT.pack(tick, ACTIONS.index(action) << 1 | pressed)
+                for tick, action, pressed in self.events
+            ))
+
+    @classmethod
+    def load(cls, file_name):
+        with open(file_name, "rb") as file:
+            data = file.read()
+
+        magic, version, held, restart_x, restart_y, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{file_name} is not a version {VERSION} recording")
+        offset = HEADER.size
+
+        (length,) = NAME.unpack_from(data, offset)
+        offset += NAME.size
+        recording = cls(data[offset:offset + length].decode(), restart_x, restart_y, held)
+        offset += length
+
+        tick, score, outcome, x, y = END.unpack_from(data, offset)
+        recording.end = (tick, score, OUTCOMES[outcome], x, y)
+        offset += END.size
+
+        recording.events = [
+            (tick, ACTIONS[code >> 1], bool(code & 1))
+            for tick, code in EVENT.iter_unpack(data[offset:offset + count * EVENT.size])
+        ]
+        return recording
+
+
+def replay(recording, simulation=None, realtime=False):
+    """
+    Play a recording again and return its end_state. realtime paces the
+    ticks at TICK_RATE, otherwise they run as fast as possible.
+    """
+    if simulation is None:
+        simulation = GameSimulation(recording.map_name)
+    simulation.restart_x = recording.restart_x
+    simulation.restart_y = recording.restart_y
+    simulation.setup()
+    simulation.e_pressed = bool(recording.held & HELD_USE)
+    # A use held from before the recording already acted
+    simulation.use_needs_reset = simulation.e_pressed
+    simulation.a_pressed = bool(recording.held & HELD_DROP)
+
+    max_ticks = recording.end[0]
+    if not realtime:
+        simulation.run(recording.events, max_ticks)
+        return end_state(simulation)
+
+    start = time.perf_counter()
+    events = recording.events
+    index = 0
+    while simulation.outcome is None and simulation.tick < max_ticks:
+        while index < len(events) and events[index][0] <= simulation.tick + 1:
+            _, action, pressed = events[index]
+            if pressed:
+                simulation.press(action)
+            else:
+                simulation.release(action)
+            index += 1
+        simulation.step()
+        simulation.events.clear()
+
+        delay = start + simulation.tick * TICK_DURATION - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    return end_state(simulation)
+
+
+def main():
+    """Replay a recording and check it ends as recorded"""
+    recording = Recording.load(sys.argv[1])
+    realtime = "--realtime" in sys.argv[2:]
+
+    start = time.perf_counter()
+    end = replay(recording, realtime=realtime)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(recording.events)} inputs, {end[0]} ticks in {elapsed:.2f}s ({end[0] / elapsed:.0f} ticks per second)")
+    if end != recording.end:
+        print(f"MISMATCH: recorded {recording.end}, replayed {end}")
+        sys.exit(1)
+    print(f"OK: {end}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,642 @@
+"""
+Headless game simulation
+
+Holds the whole game state and steps it one fixed tick at a time. Nothing in
+here needs a window or an OpenGL context, so the level can be played by a
+script thousands of ticks per second. GameView renders and feeds input to it.
+"""
+
+import math
+import os
+import sys
+import time
+
+import arcade
+
+from assets import registry
+from animation import AnimationClip, Animator
+from bodies import KinematicBodies, solid_grid
+from bombs import BombSystem
+from collision import merge_tiles, merged_walls
+from entities.player import PlayerCharacter
+from constants import *
+from level_cache import load_level
+from profiler import profiler
+from snapshot import SceneSnapshot
+from spatial import nearest_sprite, sprites_in_radius
+from streaming import StreamedLevel
+from sweep import SweptPhysicsEngine
+from triggers import TRIGGER_LAYERS, TriggerIndex
+
+
+class GameSimulation:
+    """
+    Game logic without any rendering or sound.
+    """
+
+    def __init__(self, map_name=MAP_NAME, streaming=False, lazy=False):
+        """
+        Initializer for the simulation, streaming the level around the
+        player instead of building it whole when streaming is set. With lazy
+        set the sprite lists get no OpenGL buffers until first drawn, so the
+        level can be loaded on a worker thread (see levels.py).
+        """
+
+        # Resource paths are relative to the src directory
+        file_path = os.path.dirname(os.path.abspath(__file__))
+        os.chdir(file_path)
+
+        self.map_name = map_name
+        self.streaming = streaming
+        self.lazy = lazy
+
+        # Track the current state of what key is pressed
+        self.left_pressed = False
+        self.right_pressed = False
+        self.up_pressed = False
+        self.down_pressed = False
+        self.jump_needs_reset = False
+        self.e_pressed = False
+        self.use_needs_reset = False
+        self.a_pressed = False
+
+        # Our TileMap Object
+        self.tile_map = None
+
+        # Our Scene Object
+        self.scene = None
+
+        # Merged collision rectangles of the Platforms layer
+        self.platform_walls = None
+
+        # The scene as loaded, restored by setup instead of loading it again
+        self.snapshot = None
+
+        # Separate variable that holds the player sprite
+        self.player_sprite = None
+        self.restart_x = None
+        self.restart_y = None
+
+        # Our 'physics' engine
+        self.physics_engine = None
+
+        # Grid of the sprites the player can trigger
+        self.triggers = None
+
+        # Moving platforms and enemies, stepped together
+        self.bodies = None
+
+        # What touching each kind of trigger does, ending the tick
+        self.trigger_handlers = {
+            LAYER_NAME_ENEMIES: self.touch_enemy,
+            LAYER_NAME_WATER: self.touch_water,
+            LAYER_NAME_FLAG: self.touch_flag,
+            LAYER_NAME_COINS: self.touch_coin,
+            LAYER_NAME_EXIT: self.touch_exit,
+        }
+
+        self.end_of_map = 0
+
+        # Keep track of the score
+        self.score = 0
+
+        # Key to press
+        self.action = ""
+
+        # Number of ticks since the last setup
+        self.tick = 0
+
+        # How the run ended, None while it is still going
+        self.outcome = None
+
+        # (name, x, y) events produced since the renderer last drained them
+        self.events = []
+
+        # Recording the inputs are logged to, see replay.py
+        self.recording = None
+
+        self.animator = Animator()
+        self.enemy_clip = AnimationClip(
+            [registry.texture("../rsc/PNG/Enemies/sawHalf.png"),
+             registry.texture("../rsc/PNG/Enemies/sawHalf_move.png")],
+            ENEMY_FRAME_TICKS)
+
+        # Armed bombs
+        self.bombs = BombSystem(registry.texture("../rsc/PNG/Tiles/bomb.png"), lazy=lazy)
+
+    def load(self):
+        """Load the level from the map and snapshot it."""
+
+        # Layer Specific Options for the Tilemap
+        layer_options = {
+            LAYER_NAME_MOVING_PLATFORMS: {
+                "use_spatial_hash": True,
+            },
+            LAYER_NAME_WATER: {
+                "use_spatial_hash": True,
+            },
+            LAYER_NAME_COINS: {
+                "use_spatial_hash": True,
+            },
+            LAYER_NAME_ENEMIES: {
+                "use_spatial_hash": True,
+            },
+            LAYER_NAME_FLAG: {
+                "use_spatial_hash": True,
+            },
+            LAYER_NAME_KEY: {
+                "use_spatial_hash": True,
+            },
+            LAYER_NAME_DOOR: {
+                "use_spatial_hash": True,
+            },
+            # Without a spatial hash arcade falls back to GPU collision
+            # checks, which need a window.
+            LAYER_NAME_BOMB_WALLS: {
+                "use_spatial_hash": True,
+            },
+            LAYER_NAME_EXIT: {
+                "use_spatial_hash": True,
+            },
+            LAYER_NAME_BOMB: {
+                "use_spatial_hash": True,
+            }
+        }
+
+        # Load in TileMap, through the compiled level cache, and initiate New Scene
+        # with it, this will automatically add all layers from the map as
+        # SpriteLists in the scene in the proper order.
+        if self.streaming:
+            self.tile_map = StreamedLevel(self.map_name, TILE_SCALING, layer_options, lazy=self.lazy)
+        else:
+            self.tile_map = load_level(self.map_name, TILE_SCALING, layer_options, self.lazy)
+        self.scene = self.tile_map.to_scene()
+        self.snapshot = SceneSnapshot.of_scene(self.scene, skip_layers=[LAYER_NAME_PLAYER])
+
+        # The platforms are collided with as merged rectangles, the tiles are only drawn
+        if self.streaming:
+            self.platform_walls = self.tile_map.platform_walls
+        else:
+            self.platform_walls = merge_tiles(self.scene[LAYER_NAME_PLATFORMS], lazy=self.lazy)
+
+        # Solid cells of the level, for the bodies moving freely to turn back at
+        if self.streaming:
+            xs, ys = self.tile_map.layer_centers(LAYER_NAME_PLATFORMS)
+        else:
+            xs = [sprite.center_x for sprite in self.scene[LAYER_NAME_PLATFORMS]]
+            ys = [sprite.center_y for sprite in self.scene[LAYER_NAME_PLATFORMS]]
+        self.bodies = KinematicBodies(solid_grid(xs, ys))
+
+        # Set up the player, it is reused by every setup
+        self.player_sprite = PlayerCharacter(self.animator)
+        player_list = arcade.SpriteList(lazy=self.lazy)
+        player_list.append(self.player_sprite)
+        self.scene.add_sprite_list(LAYER_NAME_PLAYER, sprite_list=player_list)
+
+        # Calculate the right edge of the my_map in pixels
+        self.end_of_map = self.tile_map.width * GRID_PIXEL_SIZE
+
+    def setup(self):
+        """Set up the level. Call this function to restart the game."""
+
+        if self.snapshot is None:
+            self.load()
+        else:
+            if self.streaming:
+                self.tile_map.reset()
+            self.snapshot.restore()
+
+        self.triggers = TriggerIndex.from_scene(self.scene)
+        self.bodies.clear()
+        for kind in (LAYER_NAME_MOVING_PLATFORMS, LAYER_NAME_ENEMIES):
+            for sprite in self.scene[kind]:
+                self.add_body(kind, sprite)
+
+        # Every enemy plays the same clip, in step
+        self.animator.clear()
+        for enemy in self.scene[LAYER_NAME_ENEMIES]:
+            self.animator.play(enemy, self.enemy_clip)
+
+        self.left_pressed = False
+        self.right_pressed = False
+        self.up_pressed = False
+        self.down_pressed = False
+        self.jump_needs_reset = False
+        self.e_pressed = False
+        self.use_needs_reset = False
+        self.a_pressed = False
+        self.bombs.clear()
+
+        # Keep track of the score
+        self.score = 0
+
+        # Key to press
+        self.action = ""
+
+        self.tick = 0
+        self.outcome = None
+        self.events = []
+
+        if self.restart_x is None:
+            self.restart_x = self.tile_map.tile_width * TILE_SCALING * PLAYER_START_X
+        if self.restart_y is None:
+            self.restart_y = self.tile_map.tile_height * TILE_SCALING * PLAYER_START_Y
+
+        # Place the player at these coordinates
+        self.player_sprite.reset(self.restart_x, self.restart_y)
+
+        if self.streaming:
+            self.stream()
+
+        # Create the 'physics engine'. The moving platforms are walls to it,
+        # the bodies move them.
+        self.physics_engine = SweptPhysicsEngine(
+            self.player_sprite,
+            gravity_constant=GRAVITY,
+            walls=[self.platform_walls, self.scene[LAYER_NAME_DOOR], self.scene[LAYER_NAME_BOMB_WALLS],
+                   self.scene[LAYER_NAME_MOVING_PLATFORMS]],
+        )
+
+    def replace_sprites(self, name, removed, added):
+        """
+        Swap sprites of a layer for others, the level having been edited
+        while running (see hot_reload.py). Restarts keep the new sprites.
+        """
+        sprite_list = self.scene[name]
+        for sprite in removed:
+            self.triggers.remove(sprite)
+            self.bodies.remove(sprite)
+            self.animator.stop(sprite)
+            sprite.remove_from_sprite_lists()
+
+        for sprite in added:
+            sprite_list.append(sprite)
+            if name in TRIGGER_LAYERS:
+                self.triggers.add(sprite, name)
+            if name in (LAYER_NAME_MOVING_PLATFORMS, LAYER_NAME_ENEMIES):
+                self.add_body(name, sprite)
+            if name == LAYER_NAME_ENEMIES:
+                self.animator.play(sprite, self.enemy_clip)
+
+        self.snapshot.replace(name, removed, added)
+
+        if name == LAYER_NAME_PLATFORMS:
+            self.platform_walls.clear()
+            self.platform_walls.extend(merged_walls(sprite_list))
+            self.bodies.grid = solid_grid([sprite.center_x for sprite in sprite_list],
+                                          [sprite.center_y for sprite in sprite_list])
+
+    def add_body(self, kind, sprite):
+        """Step a sprite of a layer with the bodies, if it moves."""
+        if sprite.change_x or sprite.change_y:
+            # Moving platforms used to be moved by both the physics engine and
+            # scene.update, twice their speed a tick
+            self.bodies.add(sprite, 2 if kind == LAYER_NAME_MOVING_PLATFORMS else 1)
+
+    def stream(self):
+        """Stream the level in around the player, indexing what comes in."""
+        x = self.player_sprite.center_x
+        if self.tile_map.chunk_index(x) == self.tile_map.center:
+            return
+
+        # The level keeps where the moving sprites it evicts are
+        self.bodies.write_all()
+        loaded, evicted = self.tile_map.stream(x)
+
+        for kind, sprite in evicted:
+            self.triggers.remove(sprite)
+            self.bodies.remove(sprite)
+            if kind == LAYER_NAME_ENEMIES:
+                self.animator.stop(sprite)
+
+        for kind, sprite in loaded:
+            if kind in TRIGGER_LAYERS:
+                self.triggers.add(sprite, kind)
+            if kind in (LAYER_NAME_MOVING_PLATFORMS, LAYER_NAME_ENEMIES):
+                self.add_body(kind, sprite)
+            if kind == LAYER_NAME_ENEMIES:
+                self.animator.play(sprite, self.enemy_clip)
+
+    def close(self):
+        """Give back the textures the simulation holds, once done with it."""
+        registry.release(self.enemy_clip.textures)
+        registry.release(self.bombs.texture)
+        if self.tile_map is not None:
+            registry.release(self.tile_map.textures)
+        if self.player_sprite is not None:
+            player = self.player_sprite
+            registry.release([player.idle_texture_pair, player.jump_texture_pair, player.fall_texture_pair,
+                              player.walk_textures])
+
+    def restart(self):
+        """Restart the level from the beginning, dropping any checkpoint."""
+        self.restart_x = None
+        self.restart_y = None
+        self.setup()
+
+    def emit(self, name, sprite=None):
+        """Record an event at the position of a sprite (the player by default)."""
+        if sprite is None:
+            sprite = self.player_sprite
+        self.events.append((name, sprite.center_x, sprite.center_y))
+
+    def drain_events(self):
+        """Return the pending events and forget them."""
+        events = self.events
+        self.events = []
+        return events
+
+    def press(self, action):
+        """Called when an input starts being held."""
+
+        if self.recording is not None:
+            self.recording.record(self.tick + 1, action, True)
+
+        if action == INPUT_JUMP:
+            self.up_pressed = True
+        elif action == INPUT_DOWN:
+            self.down_pressed = True
+        elif action == INPUT_LEFT:
+            self.left_pressed = True
+        elif action == INPUT_RIGHT:
+            self.right_pressed = True
+        elif action == INPUT_USE:
+            self.e_pressed = True
+        elif action == INPUT_DROP:
+            self.a_pressed = True
+
+        self.process_keychange()
+
+    def release(self, action):
+        """Called when an input stops being held."""
+
+        if self.recording is not None:
+            self.recording.record(self.tick + 1, action, False)
+
+        if action == INPUT_JUMP:
+            self.up_pressed = False
+            self.jump_needs_reset = False
+        elif action == INPUT_DOWN:
+            self.down_pressed = False
+        elif action == INPUT_LEFT:
+            self.left_pressed = False
+        elif action == INPUT_RIGHT:
+            self.right_pressed = False
+        elif action == INPUT_USE:
+            self.e_pressed = False
+            self.use_needs_reset = False
+        elif action == INPUT_DROP:
+            self.a_pressed = False
+
+        self.process_keychange()
+
+    def remove_trigger(self, sprite):
+        """Take a trigger sprite out of the level."""
+        self.triggers.remove(sprite)
+        sprite.remove_from_sprite_lists()
+
+    def grab_object(self):
+
+        grabbed = self.triggers.collisions(self.player_sprite, (LAYER_NAME_KEY, LAYER_NAME_BOMB))
+        self.player_sprite.inventory = [sprite for _, sprite in grabbed]
+
+        for kind, sprite in grabbed:
+
+            if kind == LAYER_NAME_KEY:
+                self.emit(EVENT_GRAB)
+                self.remove_trigger(sprite)
+
+    def check_to_open(self):
+
+        doors = sprites_in_radius(self.scene[LAYER_NAME_DOOR], self.player_sprite.center_x,
+                                  self.player_sprite.center_y, DOOR_OPEN_DISTANCE)
+
+        for door in doors:
+            # If the key can open this door
+            if door.properties["color"] == self.player_sprite.inventory[0].properties["opening_color"]:
+                self.player_sprite.inventory = []
+                door.remove_from_sprite_lists()
+                break
+
+    def process_keychange(self):
+        """
+        Called when we change a key up/down or we move on/off a ladder.
+        """
+        # Process up/down
+        if self.up_pressed and not self.down_pressed:
+            if (
+                    self.physics_engine.can_jump(y_distance=10)
+                    and not self.jump_needs_reset
+            ):
+                self.player_sprite.change_y = PLAYER_JUMP_SPEED
+                self.jump_needs_reset = True
+                self.emit(EVENT_JUMP)
+
+        if self.right_pressed and not self.left_pressed:
+            self.player_sprite.change_x = PLAYER_MOVEMENT_SPEED
+        elif self.left_pressed and not self.right_pressed:
+            self.player_sprite.change_x = -PLAYER_MOVEMENT_SPEED
+        else:
+            self.player_sprite.change_x = 0
+
+        # Use acts once per press, holding it while another key changes does nothing more
+        if self.e_pressed and not self.use_needs_reset:
+            self.use_needs_reset = True
+
+            # if the player has an item
+            if len(self.player_sprite.inventory) == 1:
+
+                # if player has a key, check to open a door
+                if "opening_color" in self.player_sprite.inventory[0].properties.keys():
+                    self.check_to_open()
+
+                else:
+                    # player has a bomb
+                    self.bombs.arm(
+                        self.player_sprite.center_x + 100 * (-1 if self.player_sprite.facing_direction == 1 else 1),
+                        self.player_sprite.center_y - 20)
+
+            else:
+                # else check to grab object near the player
+                self.grab_object()
+
+        if self.a_pressed and len(self.player_sprite.inventory) != 0:
+            # drop the item
+            self.player_sprite.inventory = []
+
+    def explode(self, x, y):
+        """A bomb went off at (x, y)."""
+
+        # walls close to the bomb
+        for w in sprites_in_radius(self.scene[LAYER_NAME_BOMB_WALLS], x, y, EXPLOSION_RADIUS):
+            w.remove_from_sprite_lists()
+        # distance between bomb and player
+        if math.sqrt((self.player_sprite.center_x - x) ** 2 + (self.player_sprite.center_y - y) ** 2) < EXPLOSION_RADIUS:
+            # apply force to player depending on the angle between the bomb and the player
+            angle = math.atan2(self.player_sprite.center_y - y, self.player_sprite.center_x - x)
+            self.player_sprite.change_x = math.cos(angle) * 140
+            self.player_sprite.change_y = math.sin(angle) * 10
+
+        # set off the other bombs caught in the blast
+        self.bombs.detonate_near(x, y, EXPLOSION_RADIUS)
+
+        self.events.append((EVENT_EXPLOSION, x, y))
+
+    def touch_enemy(self, enemy):
+        self.outcome = OUTCOME_ENEMY
+        self.emit(EVENT_GAME_OVER)
+
+    def touch_water(self, water):
+        self.outcome = OUTCOME_WATER
+        self.emit(EVENT_WATER)
+
+    def touch_exit(self, exit_sprite):
+        self.outcome = OUTCOME_WIN
+        self.emit(EVENT_WIN)
+
+    def touch_flag(self, flag):
+        self.restart_x = self.player_sprite.center_x
+        self.restart_y = self.player_sprite.center_y
+        self.emit(EVENT_CHECKPOINT)
+        self.remove_trigger(flag)
+
+    def touch_coin(self, coin):
+        self.emit(EVENT_COIN)
+        points = 1
+        self.score += points
+        self.remove_trigger(coin)
+
+    def step(self):
+        """Advance the game by one tick."""
+
+        # Nothing moved yet this tick, even when the run is over
+        self.bodies.moves = []
+        if self.outcome is not None:
+            return
+
+        self.tick += 1
+
+        if self.streaming:
+            with profiler.phase("streaming"):
+                self.stream()
+
+        with profiler.phase("bombs"):
+            for x, y in self.bombs.update():
+                self.explode(x, y)
+
+        with profiler.phase("animator"):
+            self.animator.advance()
+
+        # Move the player with the physics engine
+        with profiler.phase("physics"):
+            self.physics_engine.update()
+
+        # Update animations
+        if self.physics_engine.can_jump():
+            self.player_sprite.can_jump = False
+        else:
+            self.player_sprite.can_jump = True
+
+        # Update Animations
+        with profiler.phase("update_animation"):
+            self.scene.update_animation(TICK_DURATION, [LAYER_NAME_PLAYER])
+
+        # Update moving platforms and enemies, those near the player on screen
+        # and in the trigger index
+        with profiler.phase("bodies"):
+            x = self.player_sprite.center_x
+            for sprite in self.bodies.update(x - BODY_ACTIVE_DISTANCE, x + BODY_ACTIVE_DISTANCE):
+                if sprite in self.triggers.records:
+                    self.triggers.move(sprite)
+
+        grab = False
+
+        with profiler.phase("collisions"):
+            collisions = self.triggers.collisions(self.player_sprite)
+
+        for kind, sprite in collisions:
+            if kind == LAYER_NAME_KEY or kind == LAYER_NAME_BOMB:
+                grab = True
+            else:
+                self.trigger_handlers[kind](sprite)
+                return
+
+        with profiler.phase("action"):
+            self.update_action(grab)
+
+        # Fell out of the level, which can only happen through a gap in it
+        if self.player_sprite.top < 0:
+            self.touch_water(None)
+
+    def update_action(self, grab):
+        """Update the action text shown to the player."""
+        near_door = len(self.player_sprite.inventory) > 0 and nearest_sprite(
+            self.scene[LAYER_NAME_DOOR], self.player_sprite.center_x, self.player_sprite.center_y,
+            DOOR_OPEN_DISTANCE)[0] is not None
+
+        if near_door:
+            self.action = 'Press E to open the door'
+        elif grab:
+            self.action = 'Press E to grab the object'
+
+        elif len(self.player_sprite.inventory) > 0:
+            if self.player_sprite.inventory[0] in self.scene[LAYER_NAME_BOMB]:
+                self.action = 'Press E to launch the bomb\nPress A to drop the object'
+            else:
+                self.action = 'Press A to drop the object'
+        else:
+            self.action = ''
+
+    def run(self, inputs=(), max_ticks=TICK_RATE * 60):
+        """
+        Play the level from an input stream until it ends or max_ticks is reached.
+
+        inputs is an iterable of (tick, action, pressed) sorted by tick; an event
+        is applied right before that tick is stepped. Returns the outcome.
+        """
+        inputs = iter(inputs)
+        pending = next(inputs, None)
+
+        while self.outcome is None and self.tick < max_ticks:
+            while pending is not None and pending[0] <= self.tick + 1:
+                _, action, pressed = pending
+                if pressed:
+                    self.press(action)
+                else:
+                    self.release(action)
+                pending = next(inputs, None)
+            self.step()
+            self.events.clear()
+
+        return self.outcome
+
+
+def measure_tick_rate(ticks=TICK_RATE * 60, map_name=MAP_NAME, streaming=False):
+    """Run the level headless with the player walking right, return ticks per second."""
+    simulation = GameSimulation(map_name, streaming)
+    simulation.setup()
+    simulation.press(INPUT_RIGHT)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if simulation.outcome is not None:
+            simulation.setup()
+            simulation.press(INPUT_RIGHT)
+        profiler.next_frame()
+        with profiler.phase("step"):
+            simulation.step()
+        simulation.events.clear()
+    elapsed = time.perf_counter() - start
+
+    return ticks / elapsed
+
+
+def main():
+    """Report the headless tick rate on the default map"""
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+    ticks = int(arguments[0]) if arguments else TICK_RATE * 60
+    print(f"{measure_tick_rate(ticks, streaming='--stream' in sys.argv[1:]):.0f} ticks per second")
+
+
+if __name__ == "__main__":
+    main()
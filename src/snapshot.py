@@ -0,0 +1,86 @@
+"""
+Scene snapshots
+
+Records which sprites each layer of a freshly loaded scene holds and where
+its moving sprites are, so the level can be put back in that state in
+place: the sprites taken out (coins, keys, doors, bombed walls...) are put
+back and the moving ones are sent back to their start, without reading the
+map or building any sprite.
+"""
+
+
+class SceneSnapshot:
+    """State of named sprite lists, such as a scene's layers, to restore them later"""
+
+    def __init__(self, sprite_lists):
+        # Name -> SpriteList
+        self.sprite_lists = dict(sprite_lists)
+
+        # Name -> its sprites, in order
+        self.layers = {name: list(sprite_list) for name, sprite_list in self.sprite_lists.items()}
+
+        # Name -> position of each of its sprites in the list
+        self.order = {
+            name: {sprite: index for index, sprite in enumerate(sprites)}
+            for name, sprites in self.layers.items()
+        }
+
+        # (sprite, center_x, center_y, change_x, change_y) of the sprites
+        # that move on their own
+        self.motion = [
+            (sprite, sprite.center_x, sprite.center_y, sprite.change_x, sprite.change_y)
+            for sprites in self.layers.values()
+            for sprite in sprites
+            if sprite.change_x or sprite.change_y
+        ]
+
+    @classmethod
+    def of_scene(cls, scene, skip_layers=()):
+        """Snapshot the layers of a scene."""
+        return cls({name: scene[name] for name in scene.name_mapping if name not in skip_layers})
+
+    def replace(self, name, removed, added, sprite_list=None):
+        """
+        Take sprites out of a list's snapshot and add others at its end, as
+        if the snapshot had been taken with them. sprite_list is needed for a
+        list not in the snapshot yet.
+        """
+        if name not in self.sprite_lists:
+            self.sprite_lists[name] = sprite_list
+            self.layers[name] = []
+        removed = set(removed)
+        sprites = [sprite for sprite in self.layers[name] if sprite not in removed] + list(added)
+        self.layers[name] = sprites
+        self.order[name] = {sprite: index for index, sprite in enumerate(sprites)}
+
+        self.motion = [motion for motion in self.motion if motion[0] not in removed]
+        self.motion += [
+            (sprite, sprite.center_x, sprite.center_y, sprite.change_x, sprite.change_y)
+            for sprite in added
+            if sprite.change_x or sprite.change_y
+        ]
+
+    def restore(self):
+        """Put the lists back as they were when the snapshot was taken."""
+        for name, sprites in self.layers.items():
+            sprite_list = self.sprite_lists[name]
+            order = self.order[name]
+
+            # Sprites added since the snapshot
+            for sprite in [sprite for sprite in sprite_list if sprite not in order]:
+                sprite_list.remove(sprite)
+
+            if len(sprite_list) == len(sprites):
+                continue
+
+            # Sprites taken out since the snapshot, back in their place
+            present = set(sprite_list)
+            for sprite in sprites:
+                if sprite not in present:
+                    sprite_list.append(sprite)
+            sprite_list.sort(key=order.__getitem__)
+
+        for sprite, center_x, center_y, change_x, change_y in self.motion:
+            sprite.position = (center_x, center_y)
+            sprite.change_x = change_x
+            sprite.change_y = change_y
@@ -0,0 +1,247 @@
+"""
+Soak test
+
+Runs a GameView through thousands of restarts, deaths and short plays,
+headless, and samples after each restart what could pile up from one run to
+the next: the sprites in every sprite list, the textures in the GPU atlas
+and in the asset registry, live Python objects and resident memory. The
+first sample is taken once warmed up, everything a cycle draws having been
+drawn once, and the run fails when any of them grew over the tolerance by
+the last one.
+
+    python soak.py [--cycles 2000] [--sample-every 50] [--warmup 20] [--ticks 90]
+                   [--tolerance 0.05] [--rss-tolerance 0.25] [--output soak.json] [--silent]
+
+--silent stands in a mute sound for every sound, for machines with no audio
+decoder.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+os.environ.setdefault("ARCADE_HEADLESS", "1")
+
+import arcade
+
+from constants import *
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Growth over the first sample that fails the run, resident memory being noisier
+TOLERANCE = 0.05
+RSS_TOLERANCE = 0.25
+
+# Inputs played at random by the play cycles
+PLAY_INPUTS = [INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_USE, INPUT_DROP]
+
+
+class SilentSound:
+    """Stands in for an arcade.Sound, playing nothing"""
+
+    source = None
+
+    def play(self, *args, **kwargs):
+        return None
+
+
+def silence():
+    """Load every sound as a SilentSound."""
+    stop_sound = arcade.stop_sound
+    arcade.load_sound = lambda *args, **kwargs: SilentSound()
+    arcade.stop_sound = lambda player: None if player is None else stop_sound(player)
+
+
+def resident_memory():
+    """Resident set size in bytes, the peak one where the current one can't be read."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def sample(window, view):
+    """Counts of what a view holds, {name: value}."""
+    from assets import registry
+
+    gc.collect()
+    counts = {
+        "background_sprites": len(view.background),
+        "scene_sprites": sum(len(sprite_list) for sprite_list in view.simulation.scene.sprite_lists),
+        "explosion_sprites": len(view.explosions.sprite_list) + len(view.explosions.free),
+        "hud_sprites": len(view.hud.sprite_list),
+        # TextureAtlas has no public count
+        "atlas_textures": len(window.ctx.default_atlas._textures),
+        "arcade_texture_cache": len(arcade.load_texture.texture_cache),
+        "registry_assets": len(registry.entries),
+        "python_objects": len(gc.get_objects()),
+        "rss_bytes": resident_memory(),
+    }
+    return counts
+
+
+class Soak:
+    """Drives a GameView through restarts, deaths and plays"""
+
+    def __init__(self, window, ticks, seed=1):
+        import ui
+
+        self.window = window
+        self.ticks = ticks
+        self.random = random.Random(seed)
+        self.view = ui.GameView()
+        window.show_view(self.view)
+
+    def warm_up(self):
+        """
+        Show everything the cycles may draw once, so the textures uploaded the
+        first time don't count as growth: the player in every pose facing
+        both ways, a bomb going off and the game over screens a cycle can
+        end on.
+        """
+        import ui
+
+        view = self.view
+        player = view.simulation.player_sprite
+        texture = player.texture
+        for pair in [player.idle_texture_pair, player.jump_texture_pair, player.fall_texture_pair,
+                     *player.walk_textures]:
+            for pose in pair:
+                player.texture = pose
+                view.on_draw()
+        player.texture = texture
+
+        # Carry the level's bomb and drop it, drawing until the explosion is over
+        view.simulation.player_sprite.inventory = [view.simulation.scene[LAYER_NAME_BOMB][0]]
+        view.simulation.press(INPUT_USE)
+        view.simulation.release(INPUT_USE)
+        for _ in range(BOMB_FUSE + 2 * TICK_RATE):
+            view.on_update(TICK_DURATION)
+            view.on_draw()
+            if self.window.current_view is not view:
+                break
+
+        for mode in (OUTCOME_ENEMY, OUTCOME_WATER):
+            self.window.show_view(ui.GameOverView(view, mode))
+            self.window.current_view.on_draw()
+            self.window.current_view.on_mouse_press(0, 0, arcade.MOUSE_BUTTON_LEFT, 0)
+        self.restart()
+
+    def restart(self):
+        view = self.view
+        view.on_key_press(arcade.key.N, 0)
+        view.on_key_release(arcade.key.N, 0)
+
+    def death(self):
+        """Fall below the level until the game over view shows, then click back to the game."""
+        view = self.view
+        view.simulation.press(INPUT_RIGHT)
+        for _ in range(self.ticks):
+            view.on_update(TICK_DURATION)
+        view.simulation.release(INPUT_RIGHT)
+
+        view.simulation.player_sprite.top = -1
+        while self.window.current_view is view:
+            view.on_update(TICK_DURATION)
+        game_over = self.window.current_view
+        game_over.on_draw()
+        game_over.on_mouse_press(0, 0, arcade.MOUSE_BUTTON_LEFT, 0)
+
+    def play(self):
+        """Play random inputs for a while, drawing now and then, then restart."""
+        view = self.view
+        for tick in range(self.ticks):
+            if self.random.random() < 0.1:
+                action = self.random.choice(PLAY_INPUTS)
+                if self.random.random() < 0.5:
+                    view.simulation.press(action)
+                else:
+                    view.simulation.release(action)
+            view.on_update(TICK_DURATION)
+            if self.window.current_view is not view:
+                # The run ended, back to the game
+                self.window.current_view.on_mouse_press(0, 0, arcade.MOUSE_BUTTON_LEFT, 0)
+                return
+            if tick % 10 == 0:
+                view.on_draw()
+        for action in PLAY_INPUTS:
+            view.simulation.release(action)
+        self.restart()
+
+    def cycle(self, index):
+        [self.restart, self.death, self.play][index % 3]()
+
+
+def growth(first, last):
+    """{name: (first, last, relative growth)} of every count."""
+    return {name: (first[name], last[name], (last[name] - first[name]) / max(first[name], 1)) for name in first}
+
+
+def run_soak(cycles, sample_every, warmup, ticks):
+    """Run the soak, return the samples as (cycle, seconds since the start, counts)."""
+    os.chdir(SOURCE_DIRECTORY)
+    window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, visible=False)
+    soak = Soak(window, ticks)
+
+    soak.warm_up()
+    for index in range(warmup):
+        soak.cycle(index)
+
+    samples = []
+    start = time.perf_counter()
+    for index in range(cycles):
+        if index % sample_every == 0:
+            samples.append((index, time.perf_counter() - start, sample(window, soak.view)))
+        soak.cycle(index)
+    samples.append((cycles, time.perf_counter() - start, sample(window, soak.view)))
+    window.close()
+    return samples
+
+
+def main():
+    """Run the soak and fail on growth"""
+    parser = argparse.ArgumentParser(description="Restart, die and play over and over, watching for leaks")
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--sample-every", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=20, help="cycles run before the first sample")
+    parser.add_argument("--ticks", type=int, default=90, help="ticks played by the death and play cycles")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="growth of a count that fails the run")
+    parser.add_argument("--rss-tolerance", type=float, default=RSS_TOLERANCE, help="growth of resident memory that fails the run")
+    parser.add_argument("--output", help="write the samples to this JSON file")
+    parser.add_argument("--silent", action="store_true", help="play no sound, for machines with no audio decoder")
+    arguments = parser.parse_args()
+    output = arguments.output and os.path.abspath(arguments.output)
+
+    if arguments.silent:
+        silence()
+
+    samples = run_soak(arguments.cycles, arguments.sample_every, arguments.warmup, arguments.ticks)
+    for index, seconds, counts in samples:
+        print(f"cycle {index:6} {seconds:8.1f} s  " + "  ".join(f"{name} {value}" for name, value in counts.items()))
+
+    if output:
+        with open(output, "w") as file:
+            json.dump([{"cycle": index, "seconds": seconds, **counts} for index, seconds, counts in samples], file, indent=2)
+
+    failures = []
+    for name, (first, last, change) in growth(samples[0][2], samples[-1][2]).items():
+        tolerance = arguments.rss_tolerance if name == "rss_bytes" else arguments.tolerance
+        if change > tolerance:
+            failures.append(name)
+            print(f"GROWTH {name}: {first} -> {last} ({change:+.0%})")
+    if failures:
+        sys.exit(1)
+    print(f"No growth over {arguments.tolerance:.0%} ({arguments.rss_tolerance:.0%} resident memory) "
+          f"in {arguments.cycles} cycles")
+
+
+if __name__ == "__main__":
+    main()
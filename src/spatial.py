@@ -0,0 +1,67 @@
+"""
+Radius, box and nearest-sprite queries
+
+Built on the spatial hash arcade keeps for a SpriteList created with
+use_spatial_hash, so only the sprites in the cells around the point are
+looked at. Lists without a spatial hash are scanned in full. The radius
+and nearest queries go through the sprites in the same order in every run.
+"""
+
+
+class _Box:
+    """Query rectangle, with the attributes the spatial hash reads from a sprite"""
+
+    def __init__(self, left, right, bottom, top):
+        self.left = left
+        self.right = right
+        self.bottom = bottom
+        self.top = top
+
+
+def _candidates(sprite_list, x, y, radius):
+    if sprite_list.spatial_hash is None:
+        return sprite_list
+    # A sprite's center is inside the box it is hashed with, so every sprite
+    # centered within the radius is in the cells under the query box
+    candidates = sprite_list.spatial_hash.get_objects_for_box(_Box(x - radius, x + radius, y - radius, y + radius))
+    # The hash gives a set, ordered by id() so differently in every process.
+    # Slots are given out in the same order whenever the list is changed the
+    # same way, so runs and replays pick the same sprite among ties.
+    return sorted(candidates, key=sprite_list.sprite_slot.__getitem__)
+
+
+def sprites_in_box(sprite_list, left, right, bottom, top):
+    """
+    Return the sprites of a list overlapping a box, and maybe some close to
+    it, in no set order.
+    """
+    if sprite_list.spatial_hash is None:
+        return list(sprite_list)
+    return sprite_list.spatial_hash.get_objects_for_box(_Box(left, right, bottom, top))
+
+
+def sprites_in_radius(sprite_list, x, y, radius):
+    """Return the sprites of a list whose center is closer than radius to (x, y)."""
+    radius_squared = radius ** 2
+    return [
+        sprite for sprite in _candidates(sprite_list, x, y, radius)
+        if (sprite.center_x - x) ** 2 + (sprite.center_y - y) ** 2 < radius_squared
+    ]
+
+
+def nearest_sprite(sprite_list, x, y, radius):
+    """
+    Return (sprite, distance) for the sprite of a list whose center is the
+    closest to (x, y), or (None, None) if none is closer than radius.
+    """
+    nearest = None
+    nearest_squared = radius ** 2
+    for sprite in _candidates(sprite_list, x, y, radius):
+        distance_squared = (sprite.center_x - x) ** 2 + (sprite.center_y - y) ** 2
+        if distance_squared < nearest_squared:
+            nearest = sprite
+            nearest_squared = distance_squared
+
+    if nearest is None:
+        return None, None
+    return nearest, nearest_squared ** 0.5
@@ -0,0 +1,202 @@
+"""
+Streamed levels
+
+A level far wider than the screen doesn't have to be built whole. Its
+compiled records (see level_cache.py) are split into columns of
+STREAM_CHUNK_WIDTH pixels and only the chunks around the player are turned
+into sprites, merged collision walls and trigger records. Chunks far enough
+behind or ahead are evicted and their sprites dropped.
+
+What the player changed in an evicted chunk (coins collected, keys taken,
+doors opened, walls blown up) is kept as one flag per record: a sprite that
+was taken out of its layer is not built again when its chunk comes back.
+Moving sprites are kept with their position and speed, and stay where they
+were while evicted.
+
+A moving platform travelling along x belongs to every chunk between its
+boundaries. Other sprites moving along x could go anywhere, so they are
+built once and always kept.
+"""
+
+import math
+from collections import OrderedDict
+
+import arcade
+import numpy as np
+
+from collision import merged_walls
+from constants import *
+from level_cache import (build_sprite, layer_sprite_lists, level_hit_boxes, level_scene, level_textures,
+                         read_level)
+
+
+class StreamedLevel:
+    """
+    Stands in for arcade.TileMap like CompiledLevel, but its layers only hold
+    the sprites streamed in.
+    """
+
+    def __init__(self, map_name, scaling=1.0, layer_options=None, chunk_width=STREAM_CHUNK_WIDTH, lazy=False):
+        self.records, self.meta = read_level(map_name, scaling)
+        self.width = self.meta["width"]
+        self.height = self.meta["height"]
+        self.tile_width = self.meta["tile_width"]
+        self.tile_height = self.meta["tile_height"]
+        self.properties = self.meta["properties"]
+        self.sprite_lists = OrderedDict()
+        self.object_lists = OrderedDict()
+        self.chunk_width = chunk_width
+
+        self.layer_names = [layer["name"] for layer in self.meta["layers"]]
+        self.layer_lists = layer_sprite_lists(self, self.meta, layer_options, lazy)
+        self.textures = level_textures(self.meta)
+        self.hit_boxes = level_hit_boxes(self.meta)
+
+        # Collision walls of the Platforms tiles streamed in, merged chunk by chunk
+        self.platform_walls = arcade.SpriteList(use_spatial_hash=True, lazy=lazy)
+
+        # First and last chunk each sprite can be in. Moving platforms bounce
+        # between their boundaries (see bodies.py).
+        records = self.records
+        moving_x = records["change_x"] != 0
+        if LAYER_NAME_MOVING_PLATFORMS in self.layer_names:
+            bounded = moving_x & (records["layer"] == self.layer_names.index(LAYER_NAME_MOVING_PLATFORMS))
+        else:
+            bounded = np.zeros(len(records), dtype=bool)
+        first = np.where(bounded, records["boundary_left"], records["center_x"])
+        last = np.where(bounded, records["boundary_right"], records["center_x"])
+        anywhere = (moving_x & ~bounded) | np.isnan(first) | np.isnan(last)
+        first = np.floor(np.nan_to_num(first) / chunk_width).astype(np.int64)
+        last = np.floor(np.nan_to_num(last) / chunk_width).astype(np.int64)
+
+        # Record indexes of the sprites staying in one chunk, by chunk
+        single = np.flatnonzero(~anywhere & (first == last))
+        order = np.argsort(first[single], kind="stable")
+        keys, starts = np.unique(first[single][order], return_index=True)
+        self.chunks = dict(zip(keys.tolist(), np.split(single[order], starts[1:])))
+
+        # Record indexes and chunk range of the sprites spanning several chunks
+        self.spans = np.flatnonzero(~anywhere & (first != last))
+        self.span_first = first[self.spans]
+        self.span_last = last[self.spans]
+
+        # One flag per record, set when its sprite was taken out of the level
+        self.removed = np.zeros(len(records), dtype=bool)
+
+        # Record index -> (center_x, center_y, change_x, change_y) of the
+        # moving sprites evicted
+        self.motion = {}
+
+        # Chunk index -> (list of (record index, layer name, sprite), walls) of the chunks streamed in
+        self.loaded = {}
+
+        # Record index -> (layer name, sprite) of the spanning sprites streamed in
+        self.loaded_spans = {}
+
+        # Chunk the level was last streamed around
+        self.center = None
+
+        for record in records[anywhere].tolist():
+            self.layer_lists[record[0]].append(build_sprite(record, self.textures, self.hit_boxes, self.meta))
+
+    def to_scene(self):
+        """Scene of the level's layers, empty until their chunks stream in."""
+        return level_scene(self)
+
+    def chunk_index(self, x):
+        return math.floor(x / self.chunk_width)
+
+    def layer_centers(self, name):
+        """Return the x and y arrays of the centers of all the sprites of a layer, streamed in or not."""
+        records = self.records[self.records["layer"] == self.layer_names.index(name)]
+        return records["center_x"], records["center_y"]
+
+    def stream(self, x):
+        """
+        Stream in the chunks around x and evict the ones too far from it.
+        Returns the (layer name, sprite) streamed in and evicted.
+        """
+        center = self.chunk_index(x)
+        if center == self.center:
+            return [], []
+        self.center = center
+
+        loaded = []
+        for index in range(center - STREAM_LOAD_CHUNKS, center + STREAM_LOAD_CHUNKS + 1):
+            if index in self.chunks and index not in self.loaded:
+                loaded += self._load_chunk(index)
+
+        wanted = (self.span_first <= center + STREAM_LOAD_CHUNKS) & (self.span_last >= center - STREAM_LOAD_CHUNKS)
+        for record_index in self.spans[wanted].tolist():
+            if record_index not in self.loaded_spans and not self.removed[record_index]:
+                self.loaded_spans[record_index] = self._build(record_index)
+                loaded.append(self.loaded_spans[record_index])
+
+        evicted = []
+        for index in [index for index in self.loaded if abs(index - center) > STREAM_KEEP_CHUNKS]:
+            evicted += self._evict_chunk(index)
+
+        kept = (self.span_first <= center + STREAM_KEEP_CHUNKS) & (self.span_last >= center - STREAM_KEEP_CHUNKS)
+        for record_index in set(self.loaded_spans) - set(self.spans[kept].tolist()):
+            name, sprite = self.loaded_spans.pop(record_index)
+            if self._evict(record_index, sprite):
+                evicted.append((name, sprite))
+
+        return loaded, evicted
+
+    def reset(self):
+        """Evict every chunk and forget what was taken out of the level or moved."""
+        for index in list(self.loaded):
+            self._evict_chunk(index)
+        for record_index, (_, sprite) in self.loaded_spans.items():
+            self._evict(record_index, sprite)
+        self.loaded_spans = {}
+        self.removed[:] = False
+        self.motion = {}
+        self.center = None
+
+    def _build(self, record_index):
+        """Build a record's sprite into its layer, return (layer name, sprite)."""
+        record = self.records[record_index].tolist()
+        sprite = build_sprite(record, self.textures, self.hit_boxes, self.meta)
+        if record_index in self.motion:
+            sprite.center_x, sprite.center_y, sprite.change_x, sprite.change_y = self.motion.pop(record_index)
+        self.layer_lists[record[0]].append(sprite)
+        return self.layer_names[record[0]], sprite
+
+    def _evict(self, record_index, sprite):
+        """Drop a sprite, keeping what happened to it. Returns whether it was still in the level."""
+        if not sprite.sprite_lists:
+            # Taken out of the level, it stays out
+            self.removed[record_index] = True
+            return False
+        if sprite.change_x or sprite.change_y:
+            self.motion[record_index] = (sprite.center_x, sprite.center_y, sprite.change_x, sprite.change_y)
+        sprite.remove_from_sprite_lists()
+        return True
+
+    def _load_chunk(self, index):
+        indexes = self.chunks[index]
+        indexes = indexes[~self.removed[indexes]]
+
+        sprites = []
+        platforms = []
+        for record_index in indexes.tolist():
+            name, sprite = self._build(record_index)
+            sprites.append((record_index, name, sprite))
+            if name == LAYER_NAME_PLATFORMS:
+                platforms.append(sprite)
+
+        walls = merged_walls(platforms)
+        self.platform_walls.extend(walls)
+
+        self.loaded[index] = (sprites, walls)
+        return [(name, sprite) for _, name, sprite in sprites]
+
+    def _evict_chunk(self, index):
+        sprites, walls = self.loaded.pop(index)
+
+        for wall in walls:
+            self.platform_walls.remove(wall)
+
+        return [(name, sprite) for record_index, name, sprite in sprites if self._evict(record_index, sprite)]
@@ -0,0 +1,112 @@
+"""
+Swept collisions
+
+arcade's platformer engine moves the player by its whole speed and then
+pushes it out of the walls it overlaps. A move longer than the player plus
+a wall, like a bomb's knockback, can end entirely past the wall and never
+overlap it: the player goes through. Before each move, the path is swept
+along each axis for the walls it would go right through, and the move is
+cut short halfway into the first one, which the engine then resolves as
+any other contact.
+
+Only moves longer than the sprite itself can go through anything, so
+ordinary moves are left alone and cost nothing more.
+"""
+
+import arcade
+
+from spatial import sprites_in_box
+
+
+def _extents(sprite):
+    # Same as sprite.left, right, bottom and top, from one hit box lookup
+    points = sprite.get_adjusted_hit_box()
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return min(xs), max(xs), min(ys), max(ys)
+
+
+def _overlap(low, high, other_low, other_high):
+    return low < other_high and other_low < high
+
+
+def sweep_y(sprite, walls, change_y):
+    """Return change_y, cut halfway into the first wall it would go through."""
+    left, right, bottom, top = _extents(sprite)
+    if abs(change_y) <= top - bottom:
+        return change_y
+
+    low = min(bottom, bottom + change_y)
+    high = max(top, top + change_y)
+
+    nearest = None
+    for sprite_list in walls:
+        for wall in sprites_in_box(sprite_list, left, right, low, high):
+            if not _overlap(left, right, wall.left, wall.right):
+                continue
+            if change_y < 0:
+                # Below the player at the start, above it at the end
+                passed = wall.center_y < bottom and top + change_y <= wall.bottom
+                if passed and (nearest is None or wall.center_y > nearest):
+                    nearest = wall.center_y
+            else:
+                passed = wall.center_y > top and bottom + change_y >= wall.top
+                if passed and (nearest is None or wall.center_y < nearest):
+                    nearest = wall.center_y
+
+    if nearest is None:
+        return change_y
+    return nearest - (bottom if change_y < 0 else top)
+
+
+def sweep_x(sprite, walls, change_x, change_y=0):
+    """Return change_x, cut halfway into the first wall it would go through once moved by change_y."""
+    left, right, bottom, top = _extents(sprite)
+    if abs(change_x) <= right - left:
+        return change_x
+
+    bottom += change_y
+    top += change_y
+    low = min(left, left + change_x)
+    high = max(right, right + change_x)
+
+    nearest = None
+    for sprite_list in walls:
+        for wall in sprites_in_box(sprite_list, low, high, bottom, top):
+            if not _overlap(bottom, top, wall.bottom, wall.top):
+                continue
+            if change_x < 0:
+                passed = wall.center_x < left and right + change_x <= wall.left
+                if passed and (nearest is None or wall.center_x > nearest):
+                    nearest = wall.center_x
+            else:
+                passed = wall.center_x > right and left + change_x >= wall.right
+                if passed and (nearest is None or wall.center_x < nearest):
+                    nearest = wall.center_x
+
+    if nearest is None:
+        return change_x
+    return nearest - (left if change_x < 0 else right)
+
+
+class SweptPhysicsEngine(arcade.PhysicsEnginePlatformer):
+    """PhysicsEnginePlatformer whose player can't go through walls however fast it moves"""
+
+    def update(self):
+        sprite = self.player_sprite
+        walls = self.walls + self.platforms
+        gravity = 0 if self.is_on_ladder() else self.gravity_constant
+
+        # The engine adds gravity, then moves along y and then along x
+        change_x = sprite.change_x
+        change_y = sprite.change_y - gravity
+        swept_y = sweep_y(sprite, walls, change_y)
+        if swept_y != change_y:
+            sprite.change_y = swept_y + gravity
+        sprite.change_x = sweep_x(sprite, walls, change_x, swept_y)
+
+        hit_list = super().update()
+
+        # Stopped short for this tick only, the speed is kept
+        sprite.change_x = change_x
+        return hit_list
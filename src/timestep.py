@@ -0,0 +1,85 @@
+"""
+Fixed timestep
+
+The game logic counts ticks: bomb fuses, animation frames, jumps and speeds
+are all so many ticks or pixels per tick. FixedTimestep turns the time
+between rendered frames into a number of TICK_DURATION ticks to run, so the
+game plays at the same speed whatever the display rate. What is left over
+is how far the frame is between two ticks, which Interpolation uses to draw
+the moving sprites in between their last two positions.
+
+A frame never runs more than MAX_TICKS_PER_FRAME ticks: on a machine too
+slow to keep up, the time beyond that is dropped and the game slows down
+instead of falling further and further behind.
+"""
+
+from constants import *
+
+
+class FixedTimestep:
+    """Accumulates frame time into fixed ticks"""
+
+    def __init__(self, tick_duration=TICK_DURATION, max_ticks=MAX_TICKS_PER_FRAME):
+        self.tick_duration = tick_duration
+        self.max_ticks = max_ticks
+
+        # Time not yet run as ticks
+        self.accumulator = 0.0
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, delta_time):
+        """Add a frame's time, return how many ticks to run for it."""
+        self.accumulator += delta_time
+        ticks = int(self.accumulator / self.tick_duration)
+        if ticks > self.max_ticks:
+            # Behind by too much, drop the time that can't be caught up
+            ticks = self.max_ticks
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= ticks * self.tick_duration
+        return ticks
+
+    @property
+    def alpha(self):
+        """How far the frame is between the last tick and the next one, from 0 to 1."""
+        return min(self.accumulator / self.tick_duration, 1.0)
+
+
+class Interpolation:
+    """Positions of sprites before the last tick, to draw them in between ticks"""
+
+    def __init__(self):
+        # (sprite, x, y) before the last tick
+        self.previous = []
+
+        # (sprite, x, y) after the last tick, while drawn in between
+        self.current = []
+
+    def clear(self):
+        self.previous = []
+        self.current = []
+
+    def capture(self, sprites):
+        """Remember where sprites are, call it right before a tick."""
+        self.previous = [(sprite, sprite.center_x, sprite.center_y) for sprite in sprites]
+
+    def add(self, moves):
+        """Remember where sprites the tick moved were, given as (sprite, x, y) before it."""
+        self.previous.extend(moves)
+
+    def apply(self, alpha):
+        """Move the sprites captured alpha of the way from their previous position to their current one."""
+        self.current = []
+        for sprite, x, y in self.previous:
+            current_x, current_y = sprite.position
+            if current_x != x or current_y != y:
+                self.current.append((sprite, current_x, current_y))
+                sprite.position = (x + (current_x - x) * alpha, y + (current_y - y) * alpha)
+
+    def restore(self):
+        """Put the sprites moved by apply back where the last tick left them."""
+        for sprite, x, y in self.current:
+            sprite.position = (x, y)
+        self.current = []
@@ -0,0 +1,102 @@
+"""
+Trigger index
+
+One grid over the level holding every sprite the player can touch to set
+something off (enemies, water, flags, coins, the exit, keys and bombs). Each
+cell lists the (kind, sprite) records overlapping it, kind being the name of
+the layer the sprite came from, so a collision query only looks at the few
+cells around the player whatever the number of layers or sprites.
+"""
+
+import math
+
+import arcade
+
+from constants import *
+
+# Trigger layers, in the order their collisions are handled
+TRIGGER_LAYERS = [
+    LAYER_NAME_ENEMIES,
+    LAYER_NAME_WATER,
+    LAYER_NAME_FLAG,
+    LAYER_NAME_COINS,
+    LAYER_NAME_EXIT,
+    LAYER_NAME_KEY,
+    LAYER_NAME_BOMB,
+]
+
+_PRIORITY = {kind: priority for priority, kind in enumerate(TRIGGER_LAYERS)}
+
+
+class TriggerIndex:
+    """Grid of typed trigger records"""
+
+    def __init__(self, cell_size=GRID_PIXEL_SIZE):
+        self.cell_size = cell_size
+
+        # (column, row) -> list of (kind, sprite)
+        self.cells = {}
+
+        # sprite -> (kind, cells it is in)
+        self.records = {}
+
+    @classmethod
+    def from_scene(cls, scene, cell_size=GRID_PIXEL_SIZE):
+        """Index the trigger layers of a scene."""
+        index = cls(cell_size)
+        for kind in TRIGGER_LAYERS:
+            if kind in scene.name_mapping:
+                for sprite in scene[kind]:
+                    index.add(sprite, kind)
+        return index
+
+    def _cells_for(self, sprite):
+        size = self.cell_size
+        min_x = math.floor(sprite.left / size)
+        max_x = math.floor(sprite.right / size)
+        min_y = math.floor(sprite.bottom / size)
+        max_y = math.floor(sprite.top / size)
+        return [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+
+    def add(self, sprite, kind):
+        cells = self._cells_for(sprite)
+        record = (kind, sprite)
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(record)
+        self.records[sprite] = (kind, cells)
+
+    def remove(self, sprite):
+        """Forget a sprite, if it is indexed."""
+        if sprite not in self.records:
+            return
+        kind, cells = self.records.pop(sprite)
+        record = (kind, sprite)
+        for cell in cells:
+            records = self.cells[cell]
+            records.remove(record)
+            if not records:
+                del self.cells[cell]
+
+    def move(self, sprite):
+        """Re-index a sprite after it moved."""
+        kind, _ = self.records[sprite]
+        self.remove(sprite)
+        self.add(sprite, kind)
+
+    def collisions(self, sprite, kinds=None):
+        """
+        Return the (kind, sprite) records colliding with a sprite, in
+        TRIGGER_LAYERS order. kinds restricts the query to some layers.
+        """
+        found = []
+        seen = set()
+        for cell in self._cells_for(sprite):
+            for record in self.cells.get(cell, ()):
+                kind, other = record
+                if other in seen or (kinds is not None and kind not in kinds):
+                    continue
+                seen.add(other)
+                if arcade.check_for_collision(sprite, other):
+                    found.append(record)
+        found.sort(key=lambda record: _PRIORITY[record[0]])
+        return found
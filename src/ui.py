@@ -1,9 +1,27 @@
 import arcade
 import os
-import math
+import time
 
-from entities.player import PlayerCharacter
+from assets import registry
 from constants import *
+from culling import ChunkedScene
+from hot_reload import MapReloader
+from hud import Hud, ProfileOverlay
+from levels import LevelCache, build_level
+from profiler import profiler
+from replay import Recording
+from timestep import FixedTimestep, Interpolation
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Directory every run is recorded to, for replay.py, when set
+RECORD_DIRECTORY = os.environ.get("RECORD_DIRECTORY")
+
+# Stream the level around the player instead of building it whole, when set
+STREAM_LEVEL = os.environ.get("STREAM_LEVEL", "") not in ("", "0")
+
+# Patch the running level whenever the map file is saved, when set
+HOT_RELOAD = os.environ.get("HOT_RELOAD", "") not in ("", "0")
 
 
 class Explosion(arcade.Sprite):
@@ -12,222 +30,281 @@ class Explosion(arcade.Sprite):
         super().__init__()
         self.current_texture = 0
         self.textures = texture_list
+        self.finished = False
+
+    def restart(self, x, y):
+        self.current_texture = 0
+        self.finished = False
+        self.position = (x, y)
+        self.update()
 
     def update(self):
         self.current_texture += 1
         if self.current_texture < len(self.textures):
             self.set_texture(self.current_texture)
         else:
-            self.remove_from_sprite_lists()
+            self.finished = True
+
+
+class ExplosionPool:
+    """
+    Fixed set of Explosion sprites, reused instead of creating one per blast.
+    """
+
+    def __init__(self, texture_list, size=EXPLOSION_POOL_SIZE):
+        self.free = [Explosion(texture_list) for _ in range(size)]
+        self.sprite_list = arcade.SpriteList()
+
+    def clear(self):
+        while len(self.sprite_list) > 0:
+            explosion = self.sprite_list.pop()
+            self.free.append(explosion)
+
+    def spawn(self, x, y):
+        if self.free:
+            explosion = self.free.pop()
+            self.sprite_list.append(explosion)
+        else:
+            # Every explosion is showing, restart the oldest one
+            explosion = self.sprite_list[0]
+        explosion.restart(x, y)
+
+    def update(self):
+        for explosion in list(self.sprite_list):
+            explosion.update()
+            if explosion.finished:
+                self.sprite_list.remove(explosion)
+                self.free.append(explosion)
+
+
+# Parallax background layers, back to front
+BACKGROUND_IMAGES = ("../rsc/PNG/Backgrounds/blue_land.png",
+                     "../rsc/PNG/Backgrounds/colored_grass.png")
+
+
+def _src(file_name):
+    # Jobs can run before anything changed to the src directory
+    return os.path.join(SOURCE_DIRECTORY, file_name)
+
+
+def asset_jobs():
+    """
+    (name, loader) for every asset a GameView needs. None of the loaders
+    touch OpenGL, so they can be run by a Preloader.
+    """
+    return [
+        ("jump_sound", lambda: registry.sound(":resources:sounds/jump1.wav")),
+        ("game_over", lambda: registry.sound(":resources:sounds/gameover1.wav")),
+        ("water_sound", lambda: registry.sound(_src("../rsc/water.mp3"))),
+        ("hit_sound", lambda: registry.sound(":resources:sounds/hit5.wav")),
+        ("checkpoint_sound", lambda: registry.sound(":resources:sounds/hit1.wav")),
+        ("level_sound", lambda: registry.sound(":resources:music/funkyrobot.mp3")),
+        ("collect_coin_sound", lambda: registry.sound(":resources:sounds/coin1.wav")),
+        ("win_sound", lambda: registry.sound(_src("../rsc/win.mp3"))),
+        ("explosion_sound", lambda: registry.sound(":resources:sounds/explosion2.wav")),
+        ("red_key", lambda: registry.texture(_src("../rsc/PNG/Items/keyRed.png"))),
+        ("green_key", lambda: registry.texture(_src("../rsc/PNG/Items/keyGreen.png"))),
+        ("yellow_key", lambda: registry.texture(_src("../rsc/PNG/Items/keyYellow.png"))),
+        ("blue_key", lambda: registry.texture(_src("../rsc/PNG/Items/keyBlue.png"))),
+        ("backgrounds", lambda: [registry.texture(_src(image)) for image in BACKGROUND_IMAGES]),
+        # 60 frames of 256x256
+        ("explosion_textures", lambda: registry.spritesheet(
+            ":resources:images/spritesheets/explosion.png", 256, 256, 16, 60)),
+        # Built whole but for its OpenGL buffers, see levels.py
+        ("level", lambda: build_level(LEVELS[0], STREAM_LEVEL)),
+    ]
+
+
+# Keyboard bindings for the simulation inputs
+KEY_TO_INPUT = {
+    arcade.key.SPACE: INPUT_JUMP,
+    arcade.key.S: INPUT_DOWN,
+    arcade.key.Q: INPUT_LEFT,
+    arcade.key.D: INPUT_RIGHT,
+    arcade.key.E: INPUT_USE,
+    arcade.key.A: INPUT_DROP,
+}
 
 
 class GameView(arcade.View):
     """
     Main application class.
+
+    Renders a GameSimulation and forwards keyboard input to it.
     """
 
-    def __init__(self):
+    def __init__(self, assets=None):
         """
-        Initializer for the game
+        Initializer for the game, assets being what asset_jobs loads when
+        they were preloaded
         """
         super().__init__()
 
+        if assets is None:
+            assets = {name: job() for name, job in asset_jobs()}
+
         # Set the path to start with this program
         self.background = arcade.SpriteList()
         self.music = None
         file_path = os.path.dirname(os.path.abspath(__file__))
         os.chdir(file_path)
 
-        # Track the current state of what key is pressed
-        self.left_pressed = False
-        self.right_pressed = False
-        self.up_pressed = False
-        self.down_pressed = False
-        self.jump_needs_reset = False
-        self.e_pressed = False
-        self.a_pressed = False
-        self.bomb_pressed = False
-        self.bomb_timer = 0
-        self.explosion_list = None
-
-        # Our TileMap Object
-        self.tile_map = None
-
-        # Our Scene Object
-        self.scene = None
+        # The game logic, of the level being played
+        self.level = assets["level"]
+        self.level.initialize()
+        self.simulation = self.level.simulation
 
-        # Separate variable that holds the player sprite
-        self.player_sprite = None
-        self.restart_x = None
-        self.restart_y = None
+        # Index in LEVELS of the level being played, and the levels built
+        # so far, the next one being built ahead
+        self.level_index = 0
+        self.levels = LevelCache(streaming=STREAM_LEVEL)
+        self.levels.put(self.level)
 
-        # Our 'physics' engine
-        self.physics_engine = None
 
         # A Camera that can be used for scrolling the screen
-        self.camera = None
+        self.camera = arcade.Camera(self.window.width, self.window.height)
 
         # A Camera that can be used to draw GUI elements
-        self.gui_camera = None
-
-        self.end_of_map = 0
-
-        # Keep track of the score
-        self.score = 0
-
-        # Key to press
-        self.action = ""
-
-        # Load sounds
-        self.jump_sound = arcade.load_sound(":resources:sounds/jump1.wav")
-        self.game_over = arcade.load_sound(":resources:sounds/gameover1.wav")
-        self.water_sound = arcade.load_sound("../rsc/water.mp3")
-        self.hit_sound = arcade.load_sound(":resources:sounds/hit5.wav")
-        self.checkpoint_sound = arcade.load_sound(":resources:sounds/hit1.wav")
-        self.level_sound = arcade.load_sound(":resources:music/funkyrobot.mp3", streaming=True)
-        self.collect_coin_sound = arcade.load_sound(":resources:sounds/coin1.wav")
-        self.level_sound = arcade.load_sound(":resources:music/funkyrobot.mp3")
-        self.win_sound = arcade.load_sound("../rsc/win.mp3")
-
-        # Load textures for HUD
-        self.red_key = arcade.load_texture("../rsc/PNG/Items/keyRed.png")
-        self.green_key = arcade.load_texture("../rsc/PNG/Items/keyGreen.png")
-        self.yellow_key = arcade.load_texture("../rsc/PNG/Items/keyYellow.png")
-        self.blue_key = arcade.load_texture("../rsc/PNG/Items/keyBlue.png")
-        self.enemy_texture1 = arcade.load_texture("../rsc/PNG/Enemies/sawHalf.png")
-        self.enemy_texture2 = arcade.load_texture("../rsc/PNG/Enemies/sawHalf_move.png")
-        self.enemy_texture_timer = 0
-        self.bomb = arcade.Sprite("../rsc/PNG/Tiles/bomb.png", scale=0.5)
-        # takes too long and would cause the game to pause.
-
-        self.explosion_texture_list = []
-
-        columns = 16
-        count = 60
-        sprite_width = 256
-        sprite_height = 256
-        file_name = ":resources:images/spritesheets/explosion.png"
-
-        # Load the explosions from a sprite sheet
-        self.explosion_texture_list = arcade.load_spritesheet(file_name, sprite_width, sprite_height, columns, count)
-
-        self.explosion_sound = arcade.sound.load_sound(":resources:sounds/explosion2.wav")
+        self.gui_camera = arcade.Camera(self.window.width, self.window.height)
+
+        # Sounds
+        self.jump_sound = assets["jump_sound"]
+        self.game_over = assets["game_over"]
+        self.water_sound = assets["water_sound"]
+        self.hit_sound = assets["hit_sound"]
+        self.checkpoint_sound = assets["checkpoint_sound"]
+        self.level_sound = assets["level_sound"]
+        self.collect_coin_sound = assets["collect_coin_sound"]
+        self.win_sound = assets["win_sound"]
+        self.explosion_sound = assets["explosion_sound"]
+
+        # Textures for HUD
+        self.red_key = assets["red_key"]
+        self.green_key = assets["green_key"]
+        self.yellow_key = assets["yellow_key"]
+        self.blue_key = assets["blue_key"]
+
+        # Parallax background layers, two sprites side by side each, placed
+        # back by every setup
+        self.background_textures = assets["backgrounds"]
+        for texture in self.background_textures:
+            for _ in range(2):
+                self.background.append(arcade.Sprite(texture=texture, scale=SPRITE_SCALING))
+
+        # Explosions, from a sprite sheet
+        self.explosion_texture_list = assets["explosion_textures"]
+        self.explosions = ExplosionPool(self.explosion_texture_list)
+
+        # Fixed ticks run for the time between frames, and the moving sprites
+        # drawn in between the last two
+        self.timestep = FixedTimestep()
+        self.interpolation = Interpolation()
+
+        # The level is set up already, the first setup only has to use it
+        self.prepared = True
+
+        # The simulation's scene, split into chunks to draw only what is in
+        # view. A streamed level only holds what is around the player already.
+        self.chunked_scene = self.level.chunked_scene
+
+        # Inputs of the current run, when recording, and runs saved so far
+        self.recording = None
+        self.recordings_saved = 0
+
+        # Watches the map when hot reloading, set up once the level is loaded
+        self.map_reloader = None
 
         self.name_to_texture = {"red": self.red_key,
                                 "green": self.green_key,
                                 "blue": self.blue_key,
                                 "yellow": self.yellow_key,
-                                "bomb": self.bomb.texture}
+                                "bomb": self.simulation.bombs.texture}
+
+        # Score, action text and inventory, kept between frames
+        self.hud = Hud(self.name_to_texture)
+
+        # Frame phase timings, toggled with F3 when profiling
+        self.profile_overlay = ProfileOverlay(profiler)
+
+        # Sound played for each simulation event
+        self.event_sounds = {EVENT_JUMP: self.jump_sound,
+                             EVENT_GAME_OVER: self.game_over,
+                             EVENT_WATER: self.water_sound,
+                             EVENT_WIN: self.win_sound,
+                             EVENT_CHECKPOINT: self.checkpoint_sound,
+                             EVENT_COIN: self.collect_coin_sound,
+                             EVENT_GRAB: self.checkpoint_sound,
+                             EVENT_EXPLOSION: self.explosion_sound}
 
     def setup(self):
         """Set up the game here. Call this function to restart the game."""
 
-        # Set up the Cameras
-        self.camera = arcade.Camera(self.window.width, self.window.height)
-        self.gui_camera = arcade.Camera(self.window.width, self.window.height)
+        # Send the game camera back to the start of the level
+        self.camera.move_to((0, 0))
+        self.camera.update()
 
-        self.explosion_list = arcade.SpriteList()
+        self.explosions.clear()
+        self.timestep.reset()
+        self.interpolation.clear()
 
-        images = ("../rsc/PNG/Backgrounds/blue_land.png",
-                  "../rsc/PNG/Backgrounds/colored_grass.png")
         rise = BACKGROUND_RISE_AMOUNT * SPRITE_SCALING
-        for count, image in enumerate(images):
-            bottom = rise * len(images)
-            sprite = arcade.Sprite(image, scale=SPRITE_SCALING)
-            sprite.bottom = bottom
-            sprite.left = 0
-            self.background.append(sprite)
-
-            sprite = arcade.Sprite(image, scale=SPRITE_SCALING)
-            sprite.bottom = bottom
-            sprite.left = sprite.width
-            self.background.append(sprite)
-
-        # Map name
-        map_name = "../rsc/map.json"
-
-        # Layer Specific Options for the Tilemap
-        layer_options = {
-            LAYER_NAME_PLATFORMS: {
-                "use_spatial_hash": True,
-            },
-            LAYER_NAME_MOVING_PLATFORMS: {
-                "use_spatial_hash": True,
-            },
-            LAYER_NAME_WATER: {
-                "use_spatial_hash": True,
-            },
-            LAYER_NAME_COINS: {
-                "use_spatial_hash": True,
-            },
-            LAYER_NAME_ENEMIES: {
-                "use_spatial_hash": True,
-            },
-            LAYER_NAME_FLAG: {
-                "use_spatial_hash": True,
-            },
-            LAYER_NAME_KEY: {
-                "use_spatial_hash": True,
-            },
-            LAYER_NAME_DOOR: {
-                "use_spatial_hash": True,
-            }
-        }
-
-        # Load in TileMap
-        self.tile_map = arcade.load_tilemap(map_name, TILE_SCALING, layer_options)
-
-        # Initiate New Scene with our TileMap, this will automatically add all layers
-        # from the map as SpriteLists in the scene in the proper order.
-        self.scene = arcade.Scene.from_tilemap(self.tile_map)
-
-        self.left_pressed = False
-        self.right_pressed = False
-        self.up_pressed = False
-        self.down_pressed = False
-        self.jump_needs_reset = False
-
-        # Keep track of the score
-        self.score = 0
-
-        # Key to press
-        self.action = ""
-
-        # Set up the player, specifically placing it at these coordinates.
-        self.player_sprite = PlayerCharacter()
-
-        if self.restart_x is None:
-            self.restart_x = self.tile_map.tile_width * TILE_SCALING * PLAYER_START_X
-        if self.restart_y is None:
-            self.restart_y = self.tile_map.tile_height * TILE_SCALING * PLAYER_START_Y
-
-        self.player_sprite.center_x = self.restart_x
-        self.player_sprite.center_y = self.restart_y
-
-        self.scene.add_sprite(LAYER_NAME_PLAYER, self.player_sprite)
-
-        # Calculate the right edge of the my_map in pixels
-        self.end_of_map = self.tile_map.width * GRID_PIXEL_SIZE
+        for count, sprite in enumerate(self.background):
+            sprite.bottom = rise * len(BACKGROUND_IMAGES)
+            sprite.left = (count % 2) * sprite.width
+
+        if self.prepared:
+            self.prepared = False
+        else:
+            self.simulation.setup()
+
+        if self.simulation.streaming:
+            self.chunked_scene = None
+        elif self.chunked_scene is None or self.chunked_scene.scene is not self.simulation.scene:
+            self.chunked_scene = ChunkedScene(self.simulation.scene)
+            self.level.chunked_scene = self.chunked_scene
+        else:
+            self.chunked_scene.restore()
+
+        if HOT_RELOAD and not self.simulation.streaming and self.map_reloader is None:
+            self.map_reloader = MapReloader(self.simulation.map_name)
+            self.map_reloader.bind(self.simulation.snapshot.layers)
+
+        if RECORD_DIRECTORY:
+            self.recording = Recording.start(self.simulation)
 
         # --- Other stuff
         # Set the background color to #d0f4f7
         arcade.set_background_color(arcade.color_from_hex_string("#d0f4f7"))
 
-        # Create the 'physics engine'
-        self.physics_engine = arcade.PhysicsEnginePlatformer(
-            self.player_sprite,
-            platforms=self.scene[LAYER_NAME_MOVING_PLATFORMS],
-            gravity_constant=GRAVITY,
-            walls=[self.scene[LAYER_NAME_PLATFORMS], self.scene[LAYER_NAME_DOOR], self.scene[LAYER_NAME_BOMB_WALLS]],
-        )
         self.music = arcade.play_sound(self.level_sound)
 
+    def save_recording(self):
+        """Save the inputs of the run so far, if recording."""
+        if self.recording is None:
+            return
+        self.recording.finish(self.simulation)
+        os.makedirs(RECORD_DIRECTORY, exist_ok=True)
+        file_name = f"{time.strftime('run_%Y%m%d_%H%M%S')}_{self.recordings_saved}.rec"
+        self.recording.save(os.path.join(RECORD_DIRECTORY, file_name))
+        self.recording = None
+        self.recordings_saved += 1
+
+    def prepare(self):
+        """Lay out the HUD text ahead of the view being shown."""
+        self.hud.update(self.simulation.score, self.simulation.action, self.simulation.player_sprite.inventory)
+
     def on_show_view(self):
         self.setup()
 
     def on_draw(self):
         """Render the screen."""
 
+        with profiler.phase("draw"):
+            self.draw_frame()
+
+    def draw_frame(self):
+        simulation = self.simulation
+
         # Clear the screen to the background color
         self.clear()
 
@@ -235,166 +312,71 @@ class GameView(arcade.View):
         self.camera.use()
 
         # Draw background
-        self.background.draw()
+        with profiler.phase("draw background"):
+            self.background.draw()
+
+        # Sprites drawn between where the last two ticks left them
+        self.interpolation.apply(self.timestep.alpha)
+
+        # Draw the part of our Scene in view
+        with profiler.phase("draw scene"):
+            if self.chunked_scene is None:
+                simulation.scene.draw()
+            else:
+                left = self.camera.position[0]
+                self.chunked_scene.draw(left, left + self.camera.viewport_width)
 
-        # Draw our Scene
-        self.scene.draw()
+        # Draw the bombs
+        with profiler.phase("draw bombs and explosions"):
+            simulation.bombs.sprite_list.draw()
 
-        # Draw the bomb
-        if self.bomb_pressed:
-            self.bomb.draw()
+            self.explosions.sprite_list.draw()
 
-        self.explosion_list.draw()
+        self.interpolation.restore()
 
         # Activate the GUI camera before drawing GUI elements
         self.gui_camera.use()
 
-        # Draw our score on the screen, scrolling it with the viewport
-        coin_image = arcade.load_texture('../rsc/PNG/Items/coinGold.png')
-        arcade.draw_texture_rectangle(30, 40, coin_image.width / 2, coin_image.height / 2, coin_image, 0)
-
-        arcade.draw_text(
-            self.score,
-            55,
-            32,
-            arcade.csscolor.BLACK,
-            18,
-            font_name=("Kenney Mini Square")
-        )
-
-        arcade.draw_text(self.action,
-            SCREEN_WIDTH / 2 - 200,
-            SCREEN_HEIGHT - 100,
-            arcade.color.BLACK,
-            25,
-            font_name=("Kenney Mini Square"),
-            multiline=True,
-            width=700
-        )
-
         # Draw HUD
-        if len(self.player_sprite.inventory) == 1:
-            image = self.name_to_texture[self.player_sprite.inventory[0].properties["color"]]
-            arcade.draw_texture_rectangle(image.width // 2, image.height, image.width, image.height, image, 0)
-
-    def grab_object(self):
-
-        self.player_sprite.inventory = arcade.check_for_collision_with_lists(
-            self.player_sprite,
-            [
-                self.scene[LAYER_NAME_KEY],
-                self.scene[LAYER_NAME_BOMB]
-            ],
-        )
-        for collision in self.player_sprite.inventory:
-
-            if self.scene[LAYER_NAME_KEY] in collision.sprite_lists:
-                arcade.play_sound(self.checkpoint_sound)
-                collision.remove_from_sprite_lists()
-
-    def check_to_open(self):
-
-        door_list = self.scene[LAYER_NAME_DOOR]
-
-        for door in door_list:
-            norm_vect = math.sqrt(
-                (self.player_sprite.center_x - door.center_x) ** 2 + (self.player_sprite.center_y - door.center_y) ** 2)
-            # If the player is close to the door and the key can open this door
-            if norm_vect < 100 and door.properties["color"] == self.player_sprite.inventory[0].properties[
-                "opening_color"]:
-                self.player_sprite.inventory = []
-                door.remove_from_sprite_lists()
-
-    def process_keychange(self):
-        """
-        Called when we change a key up/down or we move on/off a ladder.
-        """
-        # Process up/down
-        if self.up_pressed and not self.down_pressed:
-            if (
-                    self.physics_engine.can_jump(y_distance=10)
-                    and not self.jump_needs_reset
-            ):
-                self.player_sprite.change_y = PLAYER_JUMP_SPEED
-                self.jump_needs_reset = True
-                arcade.play_sound(self.jump_sound)
-
-        if self.right_pressed and not self.left_pressed:
-            self.player_sprite.change_x = PLAYER_MOVEMENT_SPEED
-        elif self.left_pressed and not self.right_pressed:
-            self.player_sprite.change_x = -PLAYER_MOVEMENT_SPEED
-        else:
-            self.player_sprite.change_x = 0
-
-        if self.e_pressed:
-            # if the player has an item
-            if len(self.player_sprite.inventory) == 1:
+        with profiler.phase("draw hud"):
+            self.hud.update(simulation.score, simulation.action, simulation.player_sprite.inventory)
+            self.hud.draw()
 
-                # if player has a key, check to open a door
-                if "opening_color" in self.player_sprite.inventory[0].properties.keys():
-                    self.check_to_open()
-
-                else:
-                    # player has a bomb
-                    self.bomb.center_x = self.player_sprite.center_x + 100 * (
-                        -1 if self.player_sprite.facing_direction == 1 else 1)
-                    self.bomb.center_y = self.player_sprite.center_y - 20
-                    self.bomb_pressed = True
-                    self.bomb_timer = 120
-
-            else:
-                # else check to grab object near the player
-                self.grab_object()
-
-        if self.a_pressed and len(self.player_sprite.inventory) != 0:
-            # drop the item
-            self.player_sprite.inventory = []
+        self.profile_overlay.draw()
 
     def on_key_press(self, key, modifiers):
         """Called whenever a key is pressed."""
 
-        if key == arcade.key.SPACE:
-            self.up_pressed = True
-        elif key == arcade.key.S:
-            self.down_pressed = True
-        elif key == arcade.key.Q:
-            self.left_pressed = True
-        elif key == arcade.key.D:
-            self.right_pressed = True
-        elif key == arcade.key.E:
-            self.e_pressed = True
-        elif key == arcade.key.A:
-            self.a_pressed = True
-
-        self.process_keychange()
+        if key in KEY_TO_INPUT:
+            self.simulation.press(KEY_TO_INPUT[key])
+        elif key == arcade.key.F3 and profiler.enabled:
+            self.profile_overlay.visible = not self.profile_overlay.visible
+        else:
+            self.simulation.press(INPUT_OTHER)
+
+        self.play_events()
 
     def on_key_release(self, key, modifiers):
         """Called when the user releases a key."""
 
-        if key == arcade.key.SPACE:
-            self.up_pressed = False
-            self.jump_needs_reset = False
-        elif key == arcade.key.S:
-            self.down_pressed = False
-        elif key == arcade.key.Q:
-            self.left_pressed = False
-        elif key == arcade.key.D:
-            self.right_pressed = False
-        elif key == arcade.key.E:
-            self.e_pressed = False
-        elif key == arcade.key.A:
-            self.a_pressed = False
+        if key in KEY_TO_INPUT:
+            self.simulation.release(KEY_TO_INPUT[key])
         elif key == arcade.key.N:
-            self.restart_x = None
-            self.restart_y = None
             arcade.stop_sound(self.music)
+            self.save_recording()
+            self.simulation.restart_x = None
+            self.simulation.restart_y = None
             self.setup()
+            self.simulation.release(INPUT_OTHER)
+        else:
+            self.simulation.release(INPUT_OTHER)
 
-        self.process_keychange()
+        self.play_events()
 
-    def center_camera_to_player(self, speed=0.2):
-        screen_center_x = self.camera.scale * (self.player_sprite.center_x - (self.camera.viewport_width / 2))
-        screen_center_y = self.camera.scale * (self.player_sprite.center_y + 100 - (self.camera.viewport_height / 2))
+    def center_camera_to_player(self, speed=CAMERA_SPEED):
+        player_sprite = self.simulation.player_sprite
+        screen_center_x = self.camera.scale * (player_sprite.center_x - (self.camera.viewport_width / 2))
+        screen_center_y = self.camera.scale * (player_sprite.center_y + 100 - (self.camera.viewport_height / 2))
         if screen_center_x < 0:
             screen_center_x = 0
         if screen_center_y < 0:
@@ -403,154 +385,87 @@ class GameView(arcade.View):
 
         self.camera.move_to(player_centered, speed)
 
-    def explode(self, bomb: arcade.Sprite):
-        def distance(s1: arcade.Sprite, s2: arcade.Sprite):
-            return math.sqrt((s1.center_x - s2.center_x) ** 2 + (s1.center_y - s2.center_y) ** 2)
-
-        bomb_walls = self.scene[LAYER_NAME_BOMB_WALLS]
-        # distance between bomb and walls
-        for w in bomb_walls:
-            if distance(w, bomb) < 200:
-                w.remove_from_sprite_lists()
-        # distance between bomb and player
-        if distance(self.player_sprite, bomb) < 200:
-            # apply force to player depending on the angle between the bomb and the player
-            angle = math.atan2(self.player_sprite.center_y - bomb.center_y, self.player_sprite.center_x - bomb.center_x)
-            self.player_sprite.change_x = math.cos(angle) * 140
-            self.player_sprite.change_y = math.sin(angle) * 10
-
-        self.bomb_pressed = False
-        self.bomb_timer = 0
-        explosion = Explosion(self.explosion_texture_list)
-        explosion.center_x = bomb.center_x
-        explosion.center_y = bomb.center_y
-        explosion.update()
-        self.explosion_list.append(explosion)
-        arcade.play_sound(self.explosion_sound)
+    def play_events(self):
+        """Play the sounds and effects for what happened in the simulation."""
+
+        for name, x, y in self.simulation.drain_events():
+            if name == EVENT_EXPLOSION:
+                self.explosions.spawn(x, y)
+            elif name in (EVENT_GAME_OVER, EVENT_WATER, EVENT_WIN):
+                arcade.stop_sound(self.music)
+            arcade.play_sound(self.event_sounds[name])
 
     def on_update(self, delta_time):
         """Movement and game logic"""
 
-        if self.bomb_pressed:
-            self.bomb_timer -= 1
-            if self.bomb_timer == 0:
-                self.explode(self.bomb)
-
-        for enemy in self.scene[LAYER_NAME_ENEMIES]:
-            if self.enemy_texture_timer == 0:
-                if enemy.texture == self.enemy_texture1:
-                    enemy.texture = self.enemy_texture2
-                else:
-                    enemy.texture = self.enemy_texture1
-                self.enemy_texture_timer = 3
-            else:
-                self.enemy_texture_timer -= 1
-
-        # Move the player with the physics engine
-        self.physics_engine.update()
-
-        self.explosion_list.update()
+        profiler.next_frame()
+        with profiler.phase("update"):
+            self.update_frame(delta_time)
+
+    def next_level(self):
+        """Go on to the next level, built ahead while this one was played."""
+        self.level_index += 1
+        self.level = self.levels.get(LEVELS[self.level_index])
+        self.simulation = self.level.simulation
+        self.chunked_scene = self.level.chunked_scene
+        self.map_reloader = None
+        self.setup()
 
-        # Update animations
-        if self.physics_engine.can_jump():
-            self.player_sprite.can_jump = False
-        else:
-            self.player_sprite.can_jump = True
-
-        # Update Animations
-        self.scene.update_animation(
-            delta_time,
-            [
-                LAYER_NAME_PLAYER,
-                LAYER_NAME_ENEMIES,
-            ],
-        )
-
-        # Update moving platforms, enemies, and bullets
-        self.scene.update(
-            [LAYER_NAME_MOVING_PLATFORMS, LAYER_NAME_ENEMIES]
-        )
-
-        player_collision_list = arcade.check_for_collision_with_lists(
-            self.player_sprite,
-            [
-                self.scene[LAYER_NAME_ENEMIES],
-                self.scene[LAYER_NAME_WATER],
-                self.scene[LAYER_NAME_FLAG],
-                self.scene[LAYER_NAME_COINS],
-                self.scene[LAYER_NAME_EXIT],
-                self.scene[LAYER_NAME_KEY],
-                self.scene[LAYER_NAME_BOMB]
-            ],
-        )
-
-        grab = False
-
-        for collision in player_collision_list:
-            if self.scene[LAYER_NAME_ENEMIES] in collision.sprite_lists:
-                arcade.stop_sound(self.music)
-                arcade.play_sound(self.game_over)
-                game_over = GameOverView(self, "normal")
+    def reload_map(self):
+        """Patch the level with the edits saved to the map since the last frame."""
+        for name, (removed, added) in self.map_reloader.poll().items():
+            self.simulation.replace_sprites(name, removed, added)
+            if self.chunked_scene is not None:
+                self.chunked_scene.replace(name, removed, added)
+
+    def update_frame(self, delta_time=TICK_DURATION):
+        if self.map_reloader is not None:
+            with profiler.phase("map reload"):
+                self.reload_map()
+
+        # The next level is built once this one has run for a while, not
+        # to slow down its first frames
+        if self.level_index + 1 < len(LEVELS) and self.simulation.tick >= LEVEL_PREFETCH_TICKS:
+            self.levels.prefetch(LEVELS[self.level_index + 1])
+        self.levels.update()
+
+        # As many ticks as fit in the time since the last frame
+        for _ in range(self.timestep.advance(delta_time)):
+            # The player moves every tick, the bodies tell which of them moved
+            self.interpolation.capture([self.simulation.player_sprite])
+
+            with profiler.phase("step"):
+                self.simulation.step()
+
+            self.interpolation.add(self.simulation.bodies.moves)
+
+            with profiler.phase("events and explosions"):
+                self.play_events()
+
+                self.explosions.update()
+
+            if self.simulation.outcome is not None:
+                self.save_recording()
+                if self.simulation.outcome == OUTCOME_WIN and self.level_index + 1 < len(LEVELS):
+                    self.next_level()
+                    return
+                game_over = GameOverView(self, self.simulation.outcome)
                 self.window.show_view(game_over)
                 return
-            elif self.scene[LAYER_NAME_WATER] in collision.sprite_lists:
-                arcade.stop_sound(self.music)
-                arcade.play_sound(self.water_sound)
-                game_over = GameOverView(self, "water")
-                self.window.show_view(game_over)
-                return
-            elif self.scene[LAYER_NAME_EXIT] in collision.sprite_lists:
-                game_over = GameOverView(self, "win")
-                arcade.stop_sound(self.music)
-                arcade.play_sound(self.win_sound)
-                self.window.show_view(game_over)
-                return
-            elif self.scene[LAYER_NAME_FLAG] in collision.sprite_lists:
-                self.restart_x = self.player_sprite.center_x
-                self.restart_y = self.player_sprite.center_y
-                arcade.play_sound(self.checkpoint_sound)
-                collision.remove_from_sprite_lists()
-                return
-            elif self.scene[LAYER_NAME_COINS] in collision.sprite_lists:
-                arcade.play_sound(self.collect_coin_sound)
-                points = 1
-                self.score += points
-                collision.remove_from_sprite_lists()
-                return
-            elif self.scene[LAYER_NAME_KEY] in collision.sprite_lists or self.scene[
-                LAYER_NAME_BOMB] in collision.sprite_lists:
-                grab = True
-
-        # Update action text
-        _, distance_door = arcade.get_closest_sprite(self.player_sprite, self.scene[LAYER_NAME_DOOR])
-
-        if distance_door < 100 and len(self.player_sprite.inventory) > 0:
-            self.action = 'Press E to open the door'
-        elif grab:
-            self.action = 'Press E to grab the object'
-
-        elif len(self.player_sprite.inventory) > 0:
-            if self.player_sprite.inventory[0] in self.scene[LAYER_NAME_BOMB]:
-                self.action = 'Press E to launch the bomb\nPress A to drop the object'
-            else:
-                self.action = 'Press A to drop the object'
-        else:
-            self.action = ''
-
-        # Position the camera
-        self.center_camera_to_player()
-        camera_x = self.camera.position[0]
 
-        for count, sprite in enumerate(self.background):
-            layer = count // 2
-            frame = count % 2
-            offset = camera_x / (2 ** (layer + 1))
-            jump = (camera_x - offset) // sprite.width
-            final_offset = offset + (jump + frame) * sprite.width
-            sprite.left = final_offset
+        # Position the camera, moving as far per second whatever the frame rate
+        with profiler.phase("camera"):
+            self.center_camera_to_player(1 - (1 - CAMERA_SPEED) ** (delta_time / TICK_DURATION))
+            camera_x = self.camera.position[0]
 
-        if self.player_sprite.center_y < 0:
-            self.player_sprite.center_y = 10000
+        with profiler.phase("parallax"):
+            for count, sprite in enumerate(self.background):
+                layer = count // 2
+                frame = count % 2
+                offset = camera_x / (2 ** (layer + 1))
+                jump = (camera_x - offset) // sprite.width
+                final_offset = offset + (jump + frame) * sprite.width
+                sprite.left = final_offset
 
 
 class GameOverView(arcade.View):
@@ -562,11 +477,19 @@ class GameOverView(arcade.View):
         self.is_end = mode == "win"
         self.game_view = game_view
 
-        self.background = arcade.load_texture(f"../rsc/PNG/Menu/Game_over_{mode}.jpg")
+        self.mode = mode
+
+        # Held from the asset registry while the view is shown
+        self.background = None
 
     def on_show_view(self):
         """Called when switching to this view"""
         arcade.set_background_color(arcade.color.BLACK)
+        self.background = registry.texture(f"../rsc/PNG/Menu/Game_over_{self.mode}.jpg")
+
+    def on_hide_view(self):
+        registry.release(self.background)
+        self.background = None
 
     def on_draw(self):
         """Draw the game overview"""
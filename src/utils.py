@@ -1,11 +1,8 @@
-import arcade
+from assets import registry
 
 
 def load_texture_pair(filename):
     """
     Load a texture pair, with the second being a mirror image.
     """
-    return [
-        arcade.load_texture(filename),
-        arcade.load_texture(filename, flipped_horizontally=True),
-    ]
\ No newline at end of file
+    return registry.texture_pair(filename)
\ No newline at end of file
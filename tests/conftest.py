@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The game is run from src, as flat modules
+SOURCE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, os.path.abspath(SOURCE_DIRECTORY))
+
+os.environ.setdefault("ARCADE_HEADLESS", "1")
@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+
+import PIL.Image
+
+from assets import AssetRegistry
+
+
+class Asset:
+    pass
+
+
+def slow_load(started, seconds):
+    def load():
+        started.set()
+        time.sleep(seconds)
+        return Asset()
+    return load
+
+
+def test_lookups_do_not_wait_for_another_load():
+    registry = AssetRegistry()
+    started = threading.Event()
+    thread = threading.Thread(target=registry._get, args=("slow", slow_load(started, 0.5), lambda asset: 0))
+    thread.start()
+    started.wait()
+
+    start = time.perf_counter()
+    registry._get("fast", Asset, lambda asset: 0)
+    assert time.perf_counter() - start < 0.1
+    thread.join()
+
+
+def test_concurrent_requests_load_once():
+    registry = AssetRegistry()
+    started = threading.Event()
+    assets = []
+    threads = [threading.Thread(target=lambda: assets.append(registry._get("slow", slow_load(started, 0.2),
+                                                                          lambda asset: 0)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert registry.decodes == 1
+    assert len({id(asset) for asset in assets}) == 1
+    assert registry.entries["slow"].references == 4
+
+
+def test_failed_load_is_tried_again():
+    registry = AssetRegistry()
+
+    def fail():
+        raise OSError("missing")
+
+    try:
+        registry._get("asset", fail, lambda asset: 0)
+    except OSError:
+        pass
+    asset = registry._get("asset", Asset, lambda asset: 0)
+    assert registry.entries["asset"].asset is asset
+    assert not registry.loading
+
+
+def test_tile_textures_are_shared_and_released():
+    registry = AssetRegistry(budget=0)
+    tileset = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rsc", "Spritesheets",
+                           "spritesheet_tiles.png")
+    tiles = [[tileset, 0, 0, 128, 128, False, False, False], [tileset, 0, 0, 128, 128, True, False, False]]
+
+    first = registry.tile_textures(tiles)
+    assert registry.tile_textures(tiles[:1])[0] is first[0]
+    assert first[1].image.tobytes() == first[0].image.transpose(PIL.Image.Transpose.FLIP_LEFT_RIGHT).tobytes()
+
+    registry.release(first)
+    registry.release(first[0])
+    assert not registry.entries
@@ -0,0 +1,29 @@
+import batch
+from constants import *
+from simulation import GameSimulation
+
+
+def input_state(simulation):
+    return {name: value for name, value in vars(simulation).items()
+            if name.endswith("_pressed") or name.endswith("_needs_reset")}
+
+
+def test_sessions_on_one_worker_are_independent():
+    batch._init_worker(MAP_NAME)
+
+    # Ends with every input held
+    script = [(1, INPUT_RIGHT, True), (10, INPUT_JUMP, True), (20, INPUT_USE, True), (21, INPUT_DROP, True)]
+    first = batch._run_script((script, 120))
+    second = batch._run_script((script, 120))
+    assert first == second
+
+    batch._simulation.restart()
+    fresh = GameSimulation()
+    fresh.setup()
+    assert input_state(batch._simulation) == input_state(fresh)
+
+
+def test_run_sessions_keeps_order():
+    scripts = [[(1, INPUT_RIGHT, True), (30 + i * 7, INPUT_JUMP, True)] for i in range(4)]
+    results = batch.run_sessions(scripts, 300, workers=2)
+    assert results == [batch.run_sessions([script], 300, workers=1)[0] for script in scripts]
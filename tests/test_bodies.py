@@ -0,0 +1,88 @@
+import random
+
+import arcade
+import pytest
+
+from bodies import KinematicBodies, solid_grid
+
+
+def body(x, y, change_x, change_y, bounds=(None, None, None, None)):
+    sprite = arcade.SpriteSolidColor(64, 32, arcade.color.WHITE)
+    sprite.position = (x, y)
+    sprite.change_x, sprite.change_y = change_x, change_y
+    sprite.boundary_left, sprite.boundary_right, sprite.boundary_bottom, sprite.boundary_top = bounds
+    return sprite
+
+
+def step(sprite):
+    """A moving platform's tick in arcade's platformer engine"""
+    if sprite.boundary_left and sprite.left <= sprite.boundary_left:
+        sprite.left = sprite.boundary_left
+        if sprite.change_x < 0:
+            sprite.change_x *= -1
+    if sprite.boundary_right and sprite.right >= sprite.boundary_right:
+        sprite.right = sprite.boundary_right
+        if sprite.change_x > 0:
+            sprite.change_x *= -1
+    sprite.center_x += sprite.change_x
+
+    if sprite.boundary_top is not None and sprite.top >= sprite.boundary_top:
+        sprite.top = sprite.boundary_top
+        if sprite.change_y > 0:
+            sprite.change_y *= -1
+    if sprite.boundary_bottom is not None and sprite.bottom <= sprite.boundary_bottom:
+        sprite.bottom = sprite.boundary_bottom
+        if sprite.change_y < 0:
+            sprite.change_y *= -1
+    sprite.center_y += sprite.change_y
+
+
+def test_bodies_move_like_the_engine_moved_platforms():
+    random.seed(1)
+    specs = []
+    for _ in range(50):
+        x, y = random.randrange(200, 800), random.randrange(200, 800)
+        specs.append((x, y, random.choice([-3, -1, 0, 2, 5]), random.choice([-2, 0, 1, 4]),
+                      (x - random.randrange(40, 200), x + random.randrange(40, 200),
+                       y - random.randrange(20, 200), y + random.randrange(20, 200))))
+    reference = [body(*spec) for spec in specs]
+    stepped = [body(*spec) for spec in specs]
+
+    bodies = KinematicBodies()
+    for sprite in stepped:
+        if sprite.change_x or sprite.change_y:
+            bodies.add(sprite)
+    for _ in range(300):
+        for sprite in reference:
+            step(sprite)
+        bodies.update()
+
+    for expected, sprite in zip(reference, stepped):
+        assert sprite.position == pytest.approx(expected.position)
+        assert (sprite.change_x, sprite.change_y) == (expected.change_x, expected.change_y)
+
+
+def test_free_body_turns_at_a_solid_cell():
+    grid = solid_grid([64 * 10 + 32], [64 * 3 + 32])
+    sprite = body(64 * 5, 64 * 3 + 32, 8, 0)
+    bodies = KinematicBodies(grid)
+    bodies.add(sprite)
+    for _ in range(100):
+        bodies.update()
+        assert sprite.right <= 64 * 10
+    assert sprite.change_x < 0
+
+
+def test_far_bodies_catch_up_when_written():
+    sprite = body(0, 0, 2, 0)
+    bodies = KinematicBodies()
+    bodies.add(sprite)
+    for _ in range(10):
+        assert bodies.update(left=1000, right=2000) == []
+    assert sprite.position == (0, 0)
+    assert bodies.moves == []
+
+    bodies.write_all()
+    assert sprite.position == (20, 0)
+    bodies.update()
+    assert bodies.moves == [(sprite, 20, 0)]
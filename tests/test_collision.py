@@ -0,0 +1,25 @@
+from collision import merge_cells
+
+
+def covered(rectangles):
+    cells = []
+    for column, row, columns, rows in rectangles:
+        cells += [(x, y) for x in range(column, column + columns) for y in range(row, row + rows)]
+    return cells
+
+
+def test_rectangles_cover_each_cell_once():
+    # A floor, a wall rising from it and a floating ledge
+    cells = {(x, 0) for x in range(10)} | {(0, y) for y in range(1, 5)} | {(4, 3), (5, 3), (6, 3)}
+    rectangles = merge_cells(cells)
+    assert sorted(covered(rectangles)) == sorted(cells)
+    assert len(rectangles) == 3
+
+
+def test_same_runs_on_the_next_rows_grow_one_rectangle():
+    cells = {(x, y) for x in range(2, 6) for y in range(3)}
+    assert merge_cells(cells) == [(2, 0, 4, 3)]
+
+
+def test_no_cells_no_rectangles():
+    assert merge_cells(set()) == []
@@ -0,0 +1,43 @@
+import json
+import os
+
+from files import dump_meta, read_meta, source_stamp, write_cache
+
+
+def cache(tmp_path, text="first"):
+    source = tmp_path / "source.txt"
+    source.write_text(text)
+    data_path, meta_path = str(tmp_path / "data.bin"), str(tmp_path / "meta.json")
+    meta = {"version": 1, **source_stamp(source)}
+    write_cache(data_path, lambda file: file.write(text.encode()), meta_path, dump_meta(meta))
+    return source, meta_path, meta
+
+
+def test_fresh_cache_is_read(tmp_path):
+    source, meta_path, meta = cache(tmp_path)
+    assert read_meta(meta_path, source, version=1) == (meta, None)
+    assert sorted(os.listdir(tmp_path)) == ["data.bin", "meta.json", "source.txt"]
+
+
+def test_other_version_or_missing_meta_is_stale(tmp_path):
+    source, meta_path, _ = cache(tmp_path)
+    assert read_meta(meta_path, source, version=2) == (None, None)
+    assert read_meta(str(tmp_path / "missing.json"), source, version=1) == (None, None)
+
+
+def test_touched_source_refreshes_the_meta(tmp_path):
+    source, meta_path, meta = cache(tmp_path)
+    os.utime(source, ns=(0, 0))
+    refreshed, source_hash = read_meta(meta_path, source, version=1)
+    assert source_hash == meta["source_hash"]
+    assert refreshed["source_mtime"] == 0
+    with open(meta_path) as file:
+        assert json.load(file)["source_mtime"] == 0
+
+
+def test_edited_source_is_stale(tmp_path):
+    source, meta_path, meta = cache(tmp_path)
+    source.write_text("second, longer")
+    meta, source_hash = read_meta(meta_path, source, version=1)
+    assert meta is None
+    assert source_hash == source_stamp(source)["source_hash"]
@@ -0,0 +1,68 @@
+import json
+import os
+
+import arcade
+import pytest
+
+from constants import *
+from hot_reload import MapReloader
+
+RESOURCE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rsc")
+
+
+@pytest.fixture
+def map_file(tmp_path):
+    """A copy of the map, its tilesets given with absolute paths."""
+    with open(os.path.join(RESOURCE_DIRECTORY, "map.json")) as file:
+        data = json.load(file)
+    for tileset in data["tilesets"]:
+        tileset["image"] = os.path.abspath(os.path.join(RESOURCE_DIRECTORY, tileset["image"]))
+    path = tmp_path / "map.json"
+    path.write_text(json.dumps(data))
+    return path
+
+
+def save(path, data):
+    # A new mtime even within the file system's timestamp resolution
+    mtime = os.stat(path).st_mtime_ns
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+
+
+def reloader_of(path):
+    reloader = MapReloader(str(path))
+    tile_map = arcade.load_tilemap(str(path), TILE_SCALING)
+    reloader.bind({name: list(sprite_list) for name, sprite_list in tile_map.sprite_lists.items()})
+    return reloader, tile_map
+
+
+def test_moved_object_is_swapped(map_file):
+    reloader, tile_map = reloader_of(map_file)
+    assert reloader.poll() == {}
+
+    data = json.loads(map_file.read_text())
+    coins = next(layer for layer in data["layers"] if layer["name"] == LAYER_NAME_COINS)
+    coins["objects"][3]["x"] += 128
+    save(map_file, data)
+
+    changes = reloader.poll()
+    assert list(changes) == [LAYER_NAME_COINS]
+    (old,), (new,) = changes[LAYER_NAME_COINS]
+    assert old is tile_map.sprite_lists[LAYER_NAME_COINS][3]
+    assert new.center_x == pytest.approx(old.center_x + 128 * TILE_SCALING)
+    assert new.center_y == old.center_y
+
+    # The new sprite is the one the next edit replaces
+    coins["objects"][3]["x"] -= 128
+    save(map_file, data)
+    (removed,), _ = reloader.poll()[LAYER_NAME_COINS]
+    assert removed is new
+
+
+def test_unpatchable_edit_warns(map_file):
+    reloader, _ = reloader_of(map_file)
+    data = json.loads(map_file.read_text())
+    data["layers"].reverse()
+    save(map_file, data)
+    with pytest.warns(UserWarning, match="restart"):
+        assert reloader.poll() == {}
@@ -0,0 +1,47 @@
+import os
+
+import arcade
+
+import level_cache
+from constants import *
+
+MAP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", MAP_NAME)
+
+
+def sprites(tile_map):
+    return {
+        name: [(sprite.texture.image.tobytes(),
+                sprite.position, tuple(map(tuple, sprite.hit_box)), sprite.properties)
+               for sprite in sprite_list]
+        for name, sprite_list in tile_map.sprite_lists.items()
+    }
+
+
+def test_cold_and_warm_cache_build_the_map(tmp_path, monkeypatch):
+    # An absolute cache directory keeps the compiled files out of rsc
+    monkeypatch.setattr(level_cache, "CACHE_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(level_cache, "_loaded", {})
+    expected = sprites(arcade.load_tilemap(MAP_PATH, TILE_SCALING))
+
+    cold = level_cache.load_level(MAP_PATH, TILE_SCALING)
+    assert sorted(os.listdir(tmp_path)) == ["map.level.json", "map.level.npy"]
+    compiled = os.stat(tmp_path / "map.level.npy").st_mtime_ns
+
+    level_cache._loaded.clear()
+    warm = level_cache.load_level(MAP_PATH, TILE_SCALING)
+    assert os.stat(tmp_path / "map.level.npy").st_mtime_ns == compiled
+
+    assert sprites(cold) == expected
+    assert sprites(warm) == expected
+
+
+def test_scene_keeps_the_layer_lists(tmp_path, monkeypatch):
+    monkeypatch.setattr(level_cache, "CACHE_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(level_cache, "_loaded", {})
+    level = level_cache.load_level(MAP_PATH, TILE_SCALING, lazy=True)
+    level.sprite_lists["Empty"] = arcade.SpriteList(use_spatial_hash=True, lazy=True)
+
+    scene = level.to_scene()
+    assert list(scene.name_mapping) == list(level.sprite_lists)
+    for name, sprite_list in level.sprite_lists.items():
+        assert scene[name] is sprite_list
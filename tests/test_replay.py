@@ -0,0 +1,47 @@
+import pytest
+
+from constants import *
+from replay import HELD_USE, Recording, replay
+from simulation import GameSimulation
+
+# Runs into an enemy at tick 136
+SCRIPT = [(1, INPUT_RIGHT, True), (40, INPUT_JUMP, True), (55, INPUT_JUMP, False),
+          (70, INPUT_USE, True), (71, INPUT_USE, False), (85, INPUT_JUMP, True), (86, INPUT_JUMP, False)]
+
+
+def test_recording_round_trip(tmp_path):
+    simulation = GameSimulation()
+    simulation.setup()
+    recording = Recording.start(simulation)
+    simulation.run(SCRIPT, 300)
+    recording.finish(simulation)
+    assert recording.events == SCRIPT
+
+    file_name = str(tmp_path / "run.rec")
+    recording.save(file_name)
+    loaded = Recording.load(file_name)
+    assert (loaded.map_name, loaded.events, loaded.end) == (recording.map_name, recording.events, recording.end)
+    assert replay(loaded) == recording.end
+
+
+def test_held_inputs_are_replayed(tmp_path):
+    simulation = GameSimulation()
+    simulation.setup()
+    # Held before the recording starts
+    simulation.press(INPUT_USE)
+    recording = Recording.start(simulation)
+    simulation.run(SCRIPT[:3], 120)
+    recording.finish(simulation)
+
+    file_name = str(tmp_path / "run.rec")
+    recording.save(file_name)
+    loaded = Recording.load(file_name)
+    assert loaded.held == HELD_USE
+    assert replay(loaded) == recording.end
+
+
+def test_other_files_are_rejected(tmp_path):
+    file_name = tmp_path / "run.rec"
+    file_name.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        Recording.load(str(file_name))
@@ -0,0 +1,47 @@
+import arcade
+
+from constants import *
+from simulation import GameSimulation
+
+# Runs into an enemy at tick 136
+SCRIPT = [(1, INPUT_RIGHT, True), (40, INPUT_JUMP, True), (55, INPUT_JUMP, False),
+          (70, INPUT_USE, True), (71, INPUT_USE, False), (85, INPUT_JUMP, True), (86, INPUT_JUMP, False)]
+
+
+def state(simulation):
+    player = simulation.player_sprite
+    return simulation.tick, simulation.score, simulation.outcome, player.position, player.velocity
+
+
+def test_same_inputs_same_run():
+    first = GameSimulation()
+    first.setup()
+    first.run(SCRIPT, 300)
+    second = GameSimulation()
+    second.setup()
+    second.run(SCRIPT, 300)
+    assert state(first) == state(second)
+    assert (first.tick, first.outcome) == (136, OUTCOME_ENEMY)
+
+    # A restart plays the same again
+    first.restart()
+    first.run(SCRIPT, 300)
+    assert state(first) == state(second)
+
+
+def test_use_arms_one_bomb_per_press():
+    simulation = GameSimulation()
+    simulation.setup()
+    bomb = arcade.Sprite()
+    bomb.properties = {}
+    simulation.player_sprite.inventory = [bomb]
+
+    # Other keys changing while use is held arm nothing more
+    simulation.press(INPUT_USE)
+    simulation.press(INPUT_RIGHT)
+    simulation.release(INPUT_RIGHT)
+    assert simulation.bombs.count == 1
+
+    simulation.release(INPUT_USE)
+    simulation.press(INPUT_USE)
+    assert simulation.bombs.count == 2
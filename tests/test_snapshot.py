@@ -0,0 +1,45 @@
+import arcade
+
+from snapshot import SceneSnapshot
+
+
+def sprites(count):
+    sprite_list = arcade.SpriteList(lazy=True)
+    for index in range(count):
+        sprite = arcade.Sprite()
+        sprite.position = (index * 10, 0)
+        sprite_list.append(sprite)
+    return sprite_list
+
+
+def test_restore_puts_the_lists_back():
+    coins, platforms = sprites(4), sprites(1)
+    platform = platforms[0]
+    platform.change_x = 2
+    snapshot = SceneSnapshot({"coins": coins, "platforms": platforms})
+    before = list(coins)
+
+    coins.remove(before[1])
+    coins.remove(before[2])
+    coins.append(arcade.Sprite())
+    platform.position = (300, 40)
+    platform.change_x = -2
+
+    snapshot.restore()
+    assert list(coins) == before
+    assert (platform.position, platform.change_x) == ((0, 0), 2)
+
+
+def test_replaced_sprites_stay_through_restores():
+    coins = sprites(3)
+    snapshot = SceneSnapshot({"coins": coins})
+    old, new = coins[0], arcade.Sprite()
+    coins.remove(old)
+    coins.append(new)
+    snapshot.replace("coins", [old], [new])
+
+    coins.remove(coins[0])
+    snapshot.restore()
+    assert old not in coins
+    assert list(coins)[-1] is new
+    assert len(coins) == 3
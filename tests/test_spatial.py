@@ -0,0 +1,22 @@
+import arcade
+
+from spatial import nearest_sprite, sprites_in_radius
+
+
+def sprite_list(positions):
+    sprites = arcade.SpriteList(use_spatial_hash=True, lazy=True)
+    for x, y in positions:
+        sprite = arcade.SpriteSolidColor(16, 16, arcade.color.WHITE)
+        sprite.position = (x, y)
+        sprites.append(sprite)
+    return sprites
+
+
+def test_radius_query_in_list_order():
+    sprites = sprite_list([(x * 4, (x * 7) % 40) for x in range(50)])
+    assert sprites_in_radius(sprites, 100, 20, 500) == list(sprites)
+
+
+def test_nearest_tie_is_the_first_in_the_list():
+    sprites = sprite_list([(100, 0), (-100, 0), (0, 100), (0, -100)] * 10)
+    assert nearest_sprite(sprites, 0, 0, 200) == (sprites[0], 100)
@@ -0,0 +1,36 @@
+import arcade
+
+from sweep import sweep_x, sweep_y
+
+
+def block(x, y):
+    sprite = arcade.SpriteSolidColor(64, 64, arcade.color.WHITE)
+    sprite.position = (x, y)
+    return sprite
+
+
+def walls(*positions):
+    sprite_list = arcade.SpriteList(use_spatial_hash=True, lazy=True)
+    for x, y in positions:
+        sprite_list.append(block(x, y))
+    return [sprite_list]
+
+
+def test_fast_move_stops_halfway_into_the_first_wall():
+    player = block(0, 0)
+    # Through the wall at 300 and on past the one at 400
+    assert sweep_x(player, walls((400, 0), (300, 0)), 500) == 300 - 32
+    assert sweep_x(player, walls((-300, 0)), -500) == -300 + 32
+    assert sweep_y(player, walls((0, -300)), -500) == -300 + 32
+
+
+def test_moves_that_go_through_nothing_are_kept():
+    player = block(0, 0)
+    # Shorter than the player
+    assert sweep_x(player, walls((50, 0)), 60) == 60
+    # Ending before the wall, the engine resolves any overlap
+    assert sweep_x(player, walls((300, 0)), 250) == 250
+    # The wall is off the path
+    assert sweep_x(player, walls((300, 200)), 500) == 500
+    # Off the path once moved along y first
+    assert sweep_x(player, walls((300, 0)), 500, change_y=100) == 500
@@ -0,0 +1,31 @@
+import arcade
+
+from timestep import FixedTimestep, Interpolation
+
+
+def test_frame_time_runs_as_whole_ticks():
+    timestep = FixedTimestep(tick_duration=0.25, max_ticks=3)
+    assert timestep.advance(0.625) == 2
+    assert timestep.alpha == 0.5
+    assert timestep.advance(0.125) == 1
+    assert timestep.alpha == 0
+    assert timestep.advance(0.125) == 0
+
+
+def test_time_beyond_the_most_ticks_is_dropped():
+    timestep = FixedTimestep(tick_duration=0.25, max_ticks=3)
+    assert timestep.advance(2.0) == 3
+    assert timestep.alpha == 0
+    assert timestep.advance(0.25) == 1
+
+
+def test_sprites_drawn_between_ticks():
+    sprite = arcade.Sprite()
+    interpolation = Interpolation()
+    interpolation.capture([sprite])
+    sprite.position = (10, 20)
+
+    interpolation.apply(0.25)
+    assert sprite.position == (2.5, 5)
+    interpolation.restore()
+    assert sprite.position == (10, 20)
@@ -0,0 +1,39 @@
+import arcade
+
+from constants import *
+from triggers import TriggerIndex
+
+
+def block(x, y, size=64):
+    sprite = arcade.SpriteSolidColor(size, size, arcade.color.WHITE)
+    sprite.position = (x, y)
+    return sprite
+
+
+def test_collisions_in_layer_order():
+    index = TriggerIndex()
+    player = block(100, 100)
+    coin, enemy, far_coin = block(120, 100, 32), block(80, 110), block(600, 100, 32)
+    index.add(coin, LAYER_NAME_COINS)
+    index.add(enemy, LAYER_NAME_ENEMIES)
+    index.add(far_coin, LAYER_NAME_COINS)
+
+    assert index.collisions(player) == [(LAYER_NAME_ENEMIES, enemy), (LAYER_NAME_COINS, coin)]
+    assert index.collisions(player, (LAYER_NAME_COINS,)) == [(LAYER_NAME_COINS, coin)]
+
+
+def test_removed_and_moved_sprites():
+    index = TriggerIndex()
+    player = block(100, 100)
+    coin, enemy = block(120, 100, 32), block(500, 100)
+    index.add(coin, LAYER_NAME_COINS)
+    index.add(enemy, LAYER_NAME_ENEMIES)
+
+    index.remove(coin)
+    index.remove(coin)
+    assert index.collisions(player) == []
+
+    enemy.position = (110, 100)
+    index.move(enemy)
+    assert index.collisions(player) == [(LAYER_NAME_ENEMIES, enemy)]
+    assert all(records for records in index.cells.values())